@@ -0,0 +1,65 @@
+"""Compare FeatureProcessor.transform with its compiled numpy-only replica.
+
+Run from the project root:
+    python benchmarks/bench_compiled_processor.py
+"""
+import os
+import sys
+import timeit
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from data_loader import DataLoader
+from feature_processor import FeatureProcessor
+
+DATA_PATH = 'data/WA_Fn-UseC_-Telco-Customer-Churn.csv'
+
+
+def time_call(func, repeat=5, number=200):
+    """Best-of-repeat time per call in microseconds"""
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number * 1e6
+
+
+def main():
+    data_loader = DataLoader(DATA_PATH)
+    data_loader.load_data()
+    data_loader.prepare_features()
+    X_train, X_test, _, _ = data_loader.split_data()
+    feature_info = data_loader.get_feature_names()
+
+    feature_processor = FeatureProcessor(feature_info['categorical'], feature_info['numeric'])
+    feature_processor.fit_transform(X_train)
+    compiled = feature_processor.compile()
+
+    record = X_test.iloc[0].to_dict()
+    records = X_test.head(100).to_dict('records')
+    row_buffer = compiled.allocate(1)
+    batch_buffer = compiled.allocate(len(records))
+
+    # The compiled path must reproduce the sklearn output exactly
+    assert np.array_equal(compiled.transform_record(record, row_buffer),
+                          feature_processor.transform(pd.DataFrame([record])))
+    assert np.array_equal(compiled.transform_records(records, batch_buffer),
+                          feature_processor.transform(pd.DataFrame(records)))
+    assert np.array_equal(compiled.transform_columns(X_test), feature_processor.transform(X_test))
+
+    cases = [
+        ('single record', lambda: feature_processor.transform(pd.DataFrame([record])),
+         lambda: compiled.transform_record(record, row_buffer)),
+        ('100 records', lambda: feature_processor.transform(pd.DataFrame(records)),
+         lambda: compiled.transform_records(records, batch_buffer)),
+        (f'{len(X_test)}-row frame', lambda: feature_processor.transform(X_test),
+         lambda: compiled.transform_columns(X_test)),
+    ]
+    print(f"{'case':<20}{'sklearn (us)':>15}{'compiled (us)':>15}{'speedup':>10}")
+    for name, baseline, fast in cases:
+        number = 20 if 'frame' in name else 200
+        baseline_us = time_call(baseline, number=number)
+        fast_us = time_call(fast, number=number)
+        print(f"{name:<20}{baseline_us:>15.1f}{fast_us:>15.1f}{baseline_us / fast_us:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
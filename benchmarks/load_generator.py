@@ -0,0 +1,86 @@
+"""Drive the scoring service with concurrent keep-alive clients.
+
+Start the service first (see README), then from the project root:
+    python benchmarks/load_generator.py --concurrency 64 --requests 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from data_loader import DataLoader
+
+DATA_PATH = 'data/WA_Fn-UseC_-Telco-Customer-Churn.csv'
+
+
+async def request(reader, writer, host, method, path, body=b''):
+    """Send one HTTP/1.1 request on an open connection and return the decoded JSON body"""
+    writer.write(f'{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n'
+                 f'Content-Length: {len(body)}\r\n\r\n'.encode('latin-1') + body)
+    await writer.drain()
+    status = await reader.readline()
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    payload = await reader.readexactly(int(headers['content-length']))
+    if not status.split()[1].startswith(b'2'):
+        raise RuntimeError(f'{status.decode().strip()}: {payload.decode()}')
+    return json.loads(payload)
+
+
+async def client(host, port, bodies, counter, total, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while counter[0] < total:
+            i = counter[0]
+            counter[0] += 1
+            start = time.perf_counter()
+            await request(reader, writer, host, 'POST', '/score', bodies[i % len(bodies)])
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run(args):
+    data_loader = DataLoader(DATA_PATH)
+    data_loader.load_data()
+    X, _ = data_loader.prepare_features()
+    bodies = [json.dumps(record).encode('utf-8') for record in X.head(1000).to_dict('records')]
+
+    latencies = []
+    counter = [0]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(args.host, args.port, bodies, counter, args.requests, latencies)
+                           for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+    print(f"Client: {len(latencies):,} requests in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:,.0f} req/s), p50 {p50:.2f} ms, p99 {p99:.2f} ms")
+
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    metrics = await request(reader, writer, args.host, 'GET', '/metrics')
+    writer.close()
+    print("Server:", json.dumps(metrics, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load generator for the churn scoring service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent connections')
+    parser.add_argument('--requests', type=int, default=10000, help='Total requests to send')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,46 +1,64 @@
+import time
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
+from scipy import sparse
 from sklearn.preprocessing import StandardScaler
 from sklearn.svm import SVC
-from sklearn.model_selection import GridSearchCV
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.pipeline import Pipeline
+from sklearn.model_selection import GridSearchCV, train_test_split
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingGridSearchCV
+from derived_features import DerivedFeatures, SERVICE_COLUMNS
+from plot_aggregates import timed_plot, draw_box_summary, draw_stacked_hist, draw_binned_rate
 
 class AdvancedAnalyzer:
-    def __init__(self, data, X_processed, y):
+    # Source columns each plot reads (None for the whole frame), used to key the render cache
+    PLOT_COLUMNS = {
+        'create_advanced_visualizations': ['MonthlyCharges', 'tenure', 'Churn', 'Contract',
+                                           'PaymentMethod'] + SERVICE_COLUMNS
+    }
+
+    def __init__(self, data, X_processed, y, derived=None):
         self.data = data
         self.X_processed = X_processed
         self.y = y
+        self.derived = derived if derived is not None else DerivedFeatures.for_data(data)
+        self.render_times = {}
         
-    def create_advanced_visualizations(self):
-        """Create detailed visualizations for key relationships"""
-        # Set up the visualization style
-        plt.style.use('seaborn')
+    @timed_plot
+    def create_advanced_visualizations(self, aggregate=False):
+        """Create detailed visualizations for key relationships (aggregate=True for large data)"""
+        # Set up the visualization style (renamed to seaborn-v0_8 in matplotlib 3.6)
+        plt.style.use('seaborn-v0_8' if 'seaborn-v0_8' in plt.style.available else 'seaborn')
         
         # 1. Churn Rate by Monthly Charges Segments
         fig1, axes1 = plt.subplots(2, 2, figsize=(15, 15))
         
         # Monthly Charges Distribution
-        sns.histplot(data=self.data, x='MonthlyCharges', hue='Churn', 
-                    multiple="stack", ax=axes1[0,0])
+        if aggregate:
+            draw_stacked_hist(axes1[0,0], self.data['MonthlyCharges'], self.data['Churn'])
+        else:
+            sns.histplot(data=self.data, x='MonthlyCharges', hue='Churn', 
+                        multiple="stack", ax=axes1[0,0])
         axes1[0,0].set_title('Monthly Charges Distribution by Churn Status')
         
         # Churn Rate by Monthly Charges Quintiles
-        self.data['ChargesBin'] = pd.qcut(self.data['MonthlyCharges'], q=5)
-        churn_by_charges = self.data.groupby('ChargesBin')['Churn'].apply(
-            lambda x: (x == 'Yes').mean()
-        )
+        churn_by_charges = self.derived['Churned'].groupby(self.derived['ChargesBin'], observed=True).mean()
         churn_by_charges.plot(kind='bar', ax=axes1[0,1])
         axes1[0,1].set_title('Churn Rate by Monthly Charges Quintiles')
         
         # Multiple Services Impact
-        service_cols = ['PhoneService', 'InternetService', 'OnlineSecurity', 
-                       'OnlineBackup', 'DeviceProtection', 'TechSupport']
-        self.data['NumberOfServices'] = self.data[service_cols].apply(
-            lambda x: sum(x != 'No'), axis=1
-        )
-        sns.boxplot(data=self.data, x='NumberOfServices', y='MonthlyCharges', 
-                   hue='Churn', ax=axes1[1,0])
+        if aggregate:
+            draw_box_summary(axes1[1,0], self.derived['NumberOfServices'], self.data['MonthlyCharges'],
+                             hue=self.data['Churn'])
+        else:
+            sns.boxplot(x=self.derived['NumberOfServices'], y=self.data['MonthlyCharges'], 
+                       hue=self.data['Churn'], ax=axes1[1,0])
         axes1[1,0].set_title('Monthly Charges by Number of Services')
         
         # Churn Rate by Contract and Payment Method
@@ -58,38 +76,46 @@ class AdvancedAnalyzer:
         fig2, axes2 = plt.subplots(2, 2, figsize=(15, 15))
         
         # Tenure Distribution
-        sns.histplot(data=self.data, x='tenure', hue='Churn', 
-                    multiple="stack", ax=axes2[0,0])
+        if aggregate:
+            draw_stacked_hist(axes2[0,0], self.data['tenure'], self.data['Churn'])
+        else:
+            sns.histplot(data=self.data, x='tenure', hue='Churn', 
+                        multiple="stack", ax=axes2[0,0])
         axes2[0,0].set_title('Customer Tenure Distribution by Churn Status')
         
         # Average Monthly Charges by Tenure
-        self.data['TenureBin'] = pd.qcut(self.data['tenure'], q=5)
-        sns.boxplot(data=self.data, x='TenureBin', y='MonthlyCharges', 
-                   hue='Churn', ax=axes2[0,1])
+        if aggregate:
+            draw_box_summary(axes2[0,1], self.derived['TenureBin'], self.data['MonthlyCharges'],
+                             hue=self.data['Churn'])
+        else:
+            sns.boxplot(x=self.derived['TenureBin'], y=self.data['MonthlyCharges'], 
+                       hue=self.data['Churn'], ax=axes2[0,1])
         axes2[0,1].set_title('Monthly Charges by Tenure Quintiles')
         
         # Service Adoption Patterns
-        service_adoption = self.data[service_cols].apply(
-            lambda x: (x != 'No').mean()
-        )
+        service_adoption = self.derived['ActiveServices'].mean()
         service_adoption.plot(kind='bar', ax=axes2[1,0])
         axes2[1,0].set_title('Service Adoption Rates')
         
         # Customer Value Segments
-        self.data['CustomerValue'] = self.data['MonthlyCharges'] * self.data['tenure']
-        sns.scatterplot(data=self.data, x='tenure', y='MonthlyCharges', 
-                       hue='Churn', size='CustomerValue', sizes=(20, 200),
-                       alpha=0.6, ax=axes2[1,1])
+        if aggregate:
+            # CustomerValue is tenure x charges, so the binned grid already encodes it by position
+            draw_binned_rate(axes2[1,1], self.data['tenure'], self.data['MonthlyCharges'],
+                             self.derived['Churned'].rename('Churn'))
+        else:
+            sns.scatterplot(x=self.data['tenure'], y=self.data['MonthlyCharges'], 
+                           hue=self.data['Churn'], size=self.derived['CustomerValue'], sizes=(20, 200),
+                           alpha=0.6, ax=axes2[1,1])
         axes2[1,1].set_title('Customer Value Segments')
         
         plt.tight_layout()
         
         return [fig1, fig2]
     
-    def perform_advanced_modeling(self):
-        """Implement SVM with hyperparameter tuning"""
-        # Scale the features for SVM
-        scaler = StandardScaler()
+    def perform_advanced_modeling(self, search='grid', factor=3):
+        """Implement SVM with hyperparameter tuning (exhaustive grid or successive halving)"""
+        # Scale the features for SVM (centering would densify a sparse matrix)
+        scaler = StandardScaler(with_mean=not sparse.issparse(self.X_processed))
         X_scaled = scaler.fit_transform(self.X_processed)
         
         # Define SVM parameters for grid search
@@ -99,17 +125,148 @@ class AdvancedAnalyzer:
             'gamma': ['scale', 'auto', 0.1]
         }
         
-        # Perform grid search
-        svm = SVC(probability=True, random_state=42)
-        grid_search = GridSearchCV(svm, param_grid, cv=5, scoring='roc_auc', n_jobs=-1)
-        grid_search.fit(X_scaled, self.y)
+        if search == 'halving':
+            # Weak configurations are dropped on small samples; only the winner gets Platt calibration.
+            # roc_auc scores from decision_function, so candidates skip the internal calibration CV
+            search_cv = HalvingGridSearchCV(SVC(random_state=42), param_grid, cv=5, scoring='roc_auc',
+                                            factor=factor, resource='n_samples', refit=False,
+                                            random_state=42, n_jobs=-1)
+            search_cv.fit(X_scaled, self.y)
+            best_model = SVC(probability=True, random_state=42, **search_cv.best_params_)
+            best_model.fit(X_scaled, self.y)
+        elif search == 'grid':
+            # Perform grid search
+            svm = SVC(probability=True, random_state=42)
+            search_cv = GridSearchCV(svm, param_grid, cv=5, scoring='roc_auc', n_jobs=-1)
+            search_cv.fit(X_scaled, self.y)
+            best_model = search_cv.best_estimator_
+        else:
+            raise ValueError(f"Unknown search mode: {search}")
         
         return {
-            'best_params': grid_search.best_params_,
-            'best_score': grid_search.best_score_,
-            'model': grid_search.best_estimator_
+            'best_params': search_cv.best_params_,
+            'best_score': search_cv.best_score_,
+            'model': best_model,
+            'config_times': self._summarize_search_times(search_cv.cv_results_, search_cv.n_splits_)
         }
     
+    @staticmethod
+    def _summarize_search_times(cv_results, n_splits):
+        """Total fit and score time spent on each configuration across all search rounds"""
+        summary = {}
+        for i, params in enumerate(cv_results['params']):
+            key = tuple(sorted(params.items(), key=lambda item: item[0]))
+            entry = summary.setdefault(key, {'params': params, 'seconds': 0.0, 'rounds': 0,
+                                             'max_samples': None, 'score': None})
+            entry['seconds'] += float(cv_results['mean_fit_time'][i] + cv_results['mean_score_time'][i]) * n_splits
+            entry['rounds'] += 1
+            entry['score'] = float(cv_results['mean_test_score'][i])
+            if 'n_resources' in cv_results:
+                entry['max_samples'] = int(cv_results['n_resources'][i])
+        return sorted(summary.values(), key=lambda entry: entry['seconds'], reverse=True)
+    
+    def perform_scalable_modeling(self, method='nystroem', n_components=300, batch_size=None, epochs=5,
+                                  comparison_samples=2000, max_exact_samples=5000, scaling_sizes=None,
+                                  random_state=42):
+        """Approximate the RBF SVM with explicit kernel features and a linear classifier"""
+        scaler = StandardScaler(with_mean=not sparse.issparse(self.X_processed))
+        X_scaled = scaler.fit_transform(self.X_processed)
+        y = np.asarray(self.y)
+        gamma = self._rbf_gamma(X_scaled)
+        rng = np.random.default_rng(random_state)
+        
+        def fit_approximate(X_fit, y_fit):
+            return self._fit_kernel_approximation(X_fit, y_fit, method, n_components, gamma,
+                                                  batch_size, epochs, random_state)
+        
+        # Accuracy/AUC trade-off against the exact kernel SVC on a subsample both can handle
+        sample = rng.choice(len(y), size=min(comparison_samples, len(y)), replace=False)
+        X_train, X_test, y_train, y_test = train_test_split(
+            X_scaled[sample], y[sample], test_size=0.25, stratify=y[sample], random_state=random_state
+        )
+        start = time.perf_counter()
+        exact = SVC(kernel='rbf', gamma=gamma, random_state=random_state).fit(X_train, y_train)
+        exact_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        approximate = fit_approximate(X_train, y_train)
+        approximate_seconds = time.perf_counter() - start
+        comparison = {
+            'n_samples': len(sample),
+            'exact': {
+                'accuracy': accuracy_score(y_test, exact.predict(X_test)),
+                'roc_auc': roc_auc_score(y_test, exact.decision_function(X_test)),
+                'fit_seconds': exact_seconds
+            },
+            'approximate': {
+                'accuracy': accuracy_score(y_test, approximate.predict(X_test)),
+                'roc_auc': roc_auc_score(y_test, approximate.predict_proba(X_test)[:, 1]),
+                'fit_seconds': approximate_seconds
+            }
+        }
+        
+        # Fit-time scaling curve; the exact SVC is only timed up to max_exact_samples
+        if scaling_sizes is None:
+            scaling_sizes = sorted({min(size, len(y)) for size in (500, 1000, 2000, 4000, 8000, len(y))})
+        scaling = []
+        for size in scaling_sizes:
+            subset = rng.choice(len(y), size=size, replace=False)
+            start = time.perf_counter()
+            fit_approximate(X_scaled[subset], y[subset])
+            point = {'n_samples': size, 'approximate_seconds': time.perf_counter() - start,
+                     'exact_seconds': None}
+            if size <= max_exact_samples:
+                start = time.perf_counter()
+                SVC(kernel='rbf', gamma=gamma, random_state=random_state).fit(X_scaled[subset], y[subset])
+                point['exact_seconds'] = time.perf_counter() - start
+            scaling.append(point)
+        
+        # Final model over every row, applied to unscaled X_processed like the other models
+        model = fit_approximate(X_scaled, y)
+        model.steps.insert(0, ('scaler', scaler))
+        return {
+            'model': model,
+            'gamma': float(gamma),
+            'comparison': comparison,
+            'scaling': scaling
+        }
+    
+    @staticmethod
+    def _rbf_gamma(X):
+        """SVC's gamma='scale' value, so the approximation targets the same kernel"""
+        if sparse.issparse(X):
+            variance = X.multiply(X).mean() - X.mean() ** 2
+        else:
+            variance = X.var()
+        return 1.0 / (X.shape[1] * variance) if variance > 0 else 1.0
+    
+    @staticmethod
+    def _fit_kernel_approximation(X, y, method, n_components, gamma, batch_size, epochs, random_state):
+        """Fit an explicit kernel feature map plus a linear classifier, in mini-batches if requested"""
+        if method == 'nystroem':
+            feature_map = Nystroem(gamma=gamma, n_components=min(n_components, X.shape[0]),
+                                   random_state=random_state)
+        elif method == 'rff':
+            feature_map = RBFSampler(gamma=gamma, n_components=n_components, random_state=random_state)
+        else:
+            raise ValueError(f"Unknown kernel approximation: {method}")
+        
+        if batch_size is None:
+            feature_map.fit(X)
+            classifier = LogisticRegression(max_iter=1000).fit(feature_map.transform(X), y)
+        else:
+            # Only the landmark sample is held for the map; the classifier streams over batches
+            rng = np.random.default_rng(random_state)
+            feature_map.fit(X[rng.permutation(X.shape[0])[:max(n_components, batch_size)]])
+            classifier = SGDClassifier(loss='log_loss', random_state=random_state)
+            classes = np.unique(y)
+            for _ in range(epochs):
+                order = rng.permutation(X.shape[0])
+                for start in range(0, X.shape[0], batch_size):
+                    batch = order[start:start + batch_size]
+                    classifier.partial_fit(feature_map.transform(X[batch]), y[batch], classes=classes)
+        
+        return Pipeline([('features', feature_map), ('classifier', classifier)])
+    
     def calculate_roi_impact(self):
         """Calculate detailed ROI for recommendations"""
         avg_monthly_revenue = self.data['MonthlyCharges'].mean()
@@ -153,4 +310,51 @@ class AdvancedAnalyzer:
             rec['roi'] = (rec['yearly_savings'] - rec['implementation_cost']) / rec['implementation_cost']
             rec['payback_period'] = rec['implementation_cost'] / rec['yearly_savings'] * 12  # in months
         
-        return recommendations_impact
\ No newline at end of file
+        return recommendations_impact
+
+    def simulate_roi_impact(self, n_scenarios=1000000, seed=42, reduction_concentration=20.0,
+                            cost_sigma=0.25, percentiles=(5, 25, 50, 75, 95)):
+        """Monte Carlo ROI and payback distributions for each recommendation
+
+        Every scenario draws the segment churn reduction (beta around the
+        planned rate), the implementation cost (log-normal around the
+        estimate, so overruns are likelier than savings), the baseline churn
+        rate (beta posterior on observed churners) and the mean monthly
+        revenue of the saved customers. All scenarios of a recommendation
+        are evaluated as one set of array operations.
+        """
+        point_estimates = self.calculate_roi_impact()
+        revenue = self.data['MonthlyCharges'].to_numpy(dtype=np.float64)
+        churners = int((self.data['Churn'] == 'Yes').sum())
+        stayers = len(self.data) - churners
+
+        # One independent stream per recommendation keeps each result reproducible on its own
+        streams = np.random.SeedSequence(seed).spawn(len(point_estimates))
+        simulations = {}
+        for (name, rec), stream in zip(point_estimates.items(), streams):
+            rng = np.random.default_rng(stream)
+            reduction = rng.beta(rec['churn_reduction'] * reduction_concentration,
+                                 (1 - rec['churn_reduction']) * reduction_concentration, n_scenarios)
+            cost = rec['implementation_cost'] * rng.lognormal(0.0, cost_sigma, n_scenarios)
+            churn_rate = rng.beta(churners + 1, stayers + 1, n_scenarios)
+
+            saved_customers = rec['affected_customers'] * churn_rate * reduction
+            revenue_error = revenue.std() / np.sqrt(np.maximum(saved_customers, 1.0))
+            monthly_revenue = rng.normal(revenue.mean(), revenue_error)
+
+            yearly_savings = saved_customers * monthly_revenue * 12
+            roi = (yearly_savings - cost) / cost
+            with np.errstate(divide='ignore'):
+                payback_period = np.where(yearly_savings > 0, cost / yearly_savings * 12, np.inf)
+
+            simulations[name] = {
+                'description': rec['description'],
+                'expected_roi': float(roi.mean()),
+                'roi_percentiles': dict(zip(percentiles, np.percentile(roi, percentiles).tolist())),
+                'payback_percentiles': dict(zip(percentiles, np.percentile(payback_period, percentiles).tolist())),
+                'probability_of_loss': float((roi < 0).mean()),
+                'n_scenarios': n_scenarios,
+                'seed': seed
+            }
+
+        return simulations
@@ -0,0 +1,46 @@
+import hashlib
+import json
+import os
+import pickle
+
+
+class ArtifactStore:
+    """Pickled pipeline artifacts keyed by a hash of everything that produced them"""
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+
+    @staticmethod
+    def make_key(*parts):
+        """Hash JSON-serializable key parts (non-JSON values fall back to repr)"""
+        payload = json.dumps(parts, sort_keys=True, default=repr)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def path(self, name, key):
+        return os.path.join(self.root_dir, f'{name}-{key}.pkl')
+
+    def load(self, name, key):
+        """Return the stored artifact, or None if it has not been saved under this key"""
+        path = self.path(name, key)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def save(self, name, key, artifact):
+        """Store an artifact atomically so readers never see a partial file"""
+        os.makedirs(self.root_dir, exist_ok=True)
+        path = self.path(name, key)
+        tmp_path = f'{path}.tmp-{os.getpid()}'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        return path
+
+    def get_or_create(self, name, key, factory):
+        """Load an artifact, or build it with factory() and store it"""
+        artifact = self.load(name, key)
+        if artifact is None:
+            artifact = factory()
+            self.save(name, key, artifact)
+        return artifact
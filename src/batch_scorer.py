@@ -0,0 +1,77 @@
+import argparse
+import pickle
+import time
+import pandas as pd
+from data_loader import DataLoader
+from model_trainer import ModelTrainer
+
+class BatchScorer:
+    def __init__(self, feature_processor, model_trainer, model_name='xgboost'):
+        self.feature_processor = feature_processor
+        self.model_trainer = model_trainer
+        self.model_name = model_name
+
+    @classmethod
+    def from_artifacts(cls, preprocessor_path, models_path, model_name='xgboost'):
+        """Build a scorer from a pickled FeatureProcessor and trained model dict"""
+        with open(preprocessor_path, 'rb') as f:
+            feature_processor = pickle.load(f)
+        with open(models_path, 'rb') as f:
+            trained_models = pickle.load(f)
+
+        model_trainer = ModelTrainer()
+        model_trainer.models.update(trained_models)
+        model_trainer.trained_models = trained_models
+        return cls(feature_processor, model_trainer, model_name)
+
+    def score_csv(self, input_path, output_path, chunk_size=100000):
+        """Stream a CSV through the model, writing customerID, churn_probability rows
+
+        Input rows that fail cleaning are not scored. The summary reports
+        them in rows_dropped, so rows + rows_dropped == rows_read.
+        """
+        data_loader = DataLoader(input_path)
+        rows = 0
+        start = time.perf_counter()
+
+        with open(output_path, 'w', newline='') as f:
+            f.write('customerID,churn_probability\n')
+            # Rows that fail the loader's cleaning (e.g. blank TotalCharges) are counted, not scored
+            for chunk in data_loader.iter_chunks(chunk_size, keep_id=True):
+                X_processed = self.feature_processor.transform(chunk)
+                probabilities = self.model_trainer.predict_proba(X_processed, self.model_name)[:, 1]
+                pd.DataFrame({
+                    'customerID': chunk['customerID'].to_numpy(),
+                    'churn_probability': probabilities
+                }).to_csv(f, header=False, index=False)
+                rows += len(chunk)
+
+        elapsed = time.perf_counter() - start
+        return {
+            'rows': rows,
+            'rows_read': data_loader.rows_read,
+            'rows_dropped': data_loader.rows_dropped,
+            'seconds': elapsed,
+            'rows_per_second': rows / elapsed if elapsed > 0 else float('inf')
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description='Score a customer CSV in bounded-memory chunks')
+    parser.add_argument('input', help='CSV with the Telco customer columns, including customerID')
+    parser.add_argument('output', help='Destination CSV for customerID, churn_probability')
+    parser.add_argument('--preprocessor', required=True, help='Pickled FeatureProcessor artifact')
+    parser.add_argument('--models', required=True, help='Pickled dict of trained models')
+    parser.add_argument('--model-name', default='xgboost', help='Model to score with')
+    parser.add_argument('--chunk-size', type=int, default=100000, help='Rows per chunk')
+    args = parser.parse_args()
+
+    scorer = BatchScorer.from_artifacts(args.preprocessor, args.models, args.model_name)
+    stats = scorer.score_csv(args.input, args.output, chunk_size=args.chunk_size)
+    print(f"Scored {stats['rows']:,} rows in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_second']:,.0f} rows/sec)")
+    print(f"Skipped {stats['rows_dropped']:,} of {stats['rows_read']:,} input rows that failed cleaning "
+          f"(missing or invalid values)")
+    print(f"Scores saved to: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,41 @@
 import pandas as pd
+from derived_features import DerivedFeatures
+from segment_engine import SegmentAggregator
+from churn_cube import ChurnCube
+from retention_targeting import RetentionTargeting
 
 class BusinessAnalyzer:
-    def __init__(self, data, model, X_processed):
+    def __init__(self, data, model, X_processed, derived=None):
         self.data = data
+        self.derived = derived if derived is not None else DerivedFeatures.for_data(data)
         self.model = model
         self.X_processed = X_processed
-        self.predictions = model.predict(X_processed)
-        self.prediction_probabilities = model.predict_proba(X_processed)
+        # Inference and segment aggregates run on first use and are kept
+        self._probabilities = None
+        self._segments = None
+        
+    @property
+    def prediction_probabilities(self):
+        """Class probabilities from a single predict_proba call over the full matrix"""
+        if self._probabilities is None:
+            self._probabilities = self.model.predict_proba(self.X_processed)
+        return self._probabilities
+        
+    @property
+    def predictions(self):
+        """Churn labels derived from the probabilities (p > 0.5) instead of a second model pass"""
+        return (self.prediction_probabilities[:, 1] > 0.5).astype(int)
+        
+    @property
+    def churn_probability(self):
+        """Churn probability aligned with the data index, without copying the frame"""
+        return pd.Series(self.prediction_probabilities[:, 1], index=self.data.index, name='churn_probability')
         
     def calculate_business_metrics(self):
         """Calculate key business metrics"""
         # Calculate current metrics
         total_customers = len(self.data)
-        current_churn_rate = self.data['Churn'].map({'Yes': 1, 'No': 0}).mean()
+        current_churn_rate = (self.data['Churn'] == 'Yes').mean()
         avg_monthly_revenue = self.data['MonthlyCharges'].mean()
         avg_customer_lifetime = self.data['tenure'].mean()
         
@@ -38,19 +61,17 @@ class BusinessAnalyzer:
         
     def identify_high_risk_segments(self):
         """Identify customer segments with high churn risk"""
-        # Add prediction probabilities to data
-        data_with_proba = self.data.copy()
-        data_with_proba['churn_probability'] = self.prediction_probabilities[:, 1]
-        
-        # Analyze churn probability by different segments
-        segments = {
-            'contract_type': data_with_proba.groupby('Contract')['churn_probability'].mean(),
-            'internet_service': data_with_proba.groupby('InternetService')['churn_probability'].mean(),
-            'payment_method': data_with_proba.groupby('PaymentMethod')['churn_probability'].mean(),
-            'monthly_charges': data_with_proba.groupby(pd.qcut(data_with_proba['MonthlyCharges'], 4))['churn_probability'].mean()
-        }
+        if self._segments is None:
+            # Every dimension is aggregated in one bincount sweep instead of a groupby each
+            aggregator = SegmentAggregator({
+                'contract_type': self.data['Contract'],
+                'internet_service': self.data['InternetService'],
+                'payment_method': self.data['PaymentMethod'],
+                'monthly_charges': self.derived['MonthlyChargesQuartile']
+            })
+            self._segments = aggregator.means(self.prediction_probabilities[:, 1], 'churn_probability')
         
-        return segments
+        return dict(self._segments)
         
     def generate_recommendations(self):
         """Generate business recommendations based on analysis"""
@@ -85,4 +106,30 @@ class BusinessAnalyzer:
                 'potential_impact': 'Increase payment reliability by 25%'
             })
             
-        return recommendations
\ No newline at end of file
+        return recommendations
+        
+    def build_churn_cube(self, dimensions=None):
+        """Precompute counts, churners, predicted probability and revenue over segment combinations"""
+        if dimensions is None:
+            dimensions = {
+                'Contract': self.data['Contract'],
+                'PaymentMethod': self.data['PaymentMethod'],
+                'InternetService': self.data['InternetService'],
+                'TenureSegment': self.derived['tenure_segment'],
+                'ChargesQuartile': self.derived['MonthlyChargesQuartile']
+            }
+        return ChurnCube.build(dimensions, self.derived['Churned'],
+                               probability=self.prediction_probabilities[:, 1],
+                               revenue=self.data['MonthlyCharges'])
+        
+    def plan_retention_campaign(self, budget, interventions=None, horizon_months=12):
+        """Customers to contact under the budget, best first, with intervention, cost and expected value"""
+        targeting = RetentionTargeting(interventions, horizon_months)
+        plan = targeting.select(self.prediction_probabilities[:, 1], self.data['MonthlyCharges'], budget)
+        return pd.DataFrame({
+            'intervention': plan['interventions'],
+            'cost': plan['cost'],
+            'expected_value': plan['expected_value'],
+            'churn_probability': self.prediction_probabilities[plan['customers'], 1],
+            'MonthlyCharges': self.data['MonthlyCharges'].to_numpy()[plan['customers']]
+        }, index=self.data.index[plan['customers']])
@@ -0,0 +1,106 @@
+import json
+import numpy as np
+import pandas as pd
+from segment_engine import encode_dimension
+
+class ChurnCube:
+    """Dense churn measures over every combination of dimension categories
+
+    Each measure is an array with one axis per dimension, indexed by the
+    dimension's category codes and filled by a single bincount over the
+    raveled codes. Roll-ups and slices are array sums on that small array,
+    so drill-down questions never rescan the customer rows.
+    """
+
+    def __init__(self, dimensions, labels, measures):
+        self.dimensions = list(dimensions)
+        # Labels are kept as strings so a saved cube reloads without pickled objects
+        self.labels = {name: [str(label) for label in labels[name]] for name in self.dimensions}
+        self.measures = measures
+        self._codes = {name: {label: code for code, label in enumerate(self.labels[name])}
+                       for name in self.dimensions}
+
+    @classmethod
+    def build(cls, dimensions, churned, probability=None, revenue=None, max_cells=10000000):
+        """Aggregate row-aligned measures over a dict of categorical or pre-binned dimensions"""
+        names = list(dimensions)
+        encoded = [encode_dimension(dimensions[name]) for name in names]
+        shape = tuple(len(labels) for _, labels in encoded)
+        n_cells = int(np.prod(shape))
+        if n_cells > max_cells:
+            raise ValueError(f"Cube would have {n_cells:,} cells (limit {max_cells:,}); "
+                             f"use fewer dimensions or coarser bins")
+
+        codes = [code for code, _ in encoded]
+        valid = np.logical_and.reduce([code >= 0 for code in codes])
+        cells = np.ravel_multi_index(tuple(code[valid] for code in codes), shape)
+
+        def accumulate(values=None):
+            weights = None if values is None else np.asarray(values, dtype=np.float64)[valid]
+            return np.bincount(cells, weights=weights, minlength=n_cells).reshape(shape)
+
+        measures = {'count': accumulate(), 'churners': accumulate(churned)}
+        if probability is not None:
+            measures['probability_sum'] = accumulate(probability)
+        if revenue is not None:
+            measures['revenue'] = accumulate(revenue)
+        return cls(names, {name: labels for name, (_, labels) in zip(names, encoded)}, measures)
+
+    @property
+    def shape(self):
+        return self.measures['count'].shape
+
+    def totals(self, by=(), where=None):
+        """Raw measure arrays rolled up to the `by` dimensions after slicing on `where`
+
+        `where` maps a dimension to one label or a list of labels to keep.
+        The result has one axis per `by` dimension, in the order given.
+        """
+        by = list(by)
+        where = where or {}
+        unknown = [name for name in by + list(where) if name not in self._codes]
+        if unknown:
+            raise KeyError(f"Unknown cube dimensions: {unknown}")
+
+        result = {}
+        for measure, values in self.measures.items():
+            for name, selected in where.items():
+                selected = selected if isinstance(selected, (list, tuple, set)) else [selected]
+                keep = [self._codes[name][str(label)] for label in selected]
+                values = np.take(values, keep, axis=self.dimensions.index(name))
+            summed_axes = tuple(i for i, name in enumerate(self.dimensions) if name not in by)
+            values = values.sum(axis=summed_axes)
+            remaining = [name for name in self.dimensions if name in by]
+            result[measure] = np.transpose(values, [remaining.index(name) for name in by])
+        return result
+
+    def query(self, by=(), where=None):
+        """Roll-up as a DataFrame with churn rate and mean probability, one row per observed cell"""
+        by = list(by)
+        totals = self.totals(by, where)
+        if by:
+            labels = [self.labels[name] for name in by]
+            if len(by) == 1:
+                index = pd.Index(labels[0], name=by[0])
+            else:
+                index = pd.MultiIndex.from_product(labels, names=by)
+        else:
+            index = pd.Index(['All'])
+
+        frame = pd.DataFrame({measure: np.ravel(values) for measure, values in totals.items()}, index=index)
+        frame = frame[frame['count'] > 0]
+        frame['churn_rate'] = frame['churners'] / frame['count']
+        if 'probability_sum' in frame:
+            frame['mean_probability'] = frame['probability_sum'] / frame['count']
+        return frame
+
+    def save(self, path):
+        meta = json.dumps({'dimensions': self.dimensions, 'labels': self.labels})
+        np.savez(path, meta=meta, **self.measures)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            meta = json.loads(str(arrays['meta']))
+            measures = {name: arrays[name] for name in arrays.files if name != 'meta'}
+        return cls(meta['dimensions'], meta['labels'], measures)
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+CACHE_FORMAT_VERSION = 2
+
+
+def file_digest(path, block_size=1 << 20):
+    """Compute the SHA-256 digest of a file without reading it into memory"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ColumnCache:
+    """Directory of .npy columns keyed on source content and options
+
+    Numeric and category columns load memory-mapped; text columns are stored
+    as codes and decoded back into memory.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def key(self, source_digest, options):
+        """Build a cache key from the source file hash and the cleaning options"""
+        payload = json.dumps({
+            'source': source_digest,
+            'options': options,
+            'version': CACHE_FORMAT_VERSION
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def load(self, key):
+        """Load a cached frame, or return None if the key is not cached"""
+        entry_dir = self.path(key)
+        meta_path = os.path.join(entry_dir, 'meta.json')
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+
+        columns = {}
+        for i, column in enumerate(meta['columns']):
+            # A plain ndarray view still reads from the mapping but doesn't hand np.memmap to callers
+            values = np.load(os.path.join(entry_dir, f'{i}.npy'), mmap_mode='r').view(np.ndarray)
+            if 'categories' in column:
+                categorical = pd.Categorical.from_codes(
+                    values, categories=column['categories'], ordered=column['ordered']
+                )
+                if column['dtype'] == 'category':
+                    columns[column['name']] = categorical
+                else:
+                    columns[column['name']] = pd.Series(categorical).astype(column['dtype']).array
+            else:
+                columns[column['name']] = values
+
+        index = np.load(os.path.join(entry_dir, 'index.npy'), mmap_mode='r').view(np.ndarray)
+        # copy=False keeps one block per column, so numeric and category columns stay on the memmaps
+        # instead of being consolidated into in-memory 2-D blocks; text columns are decoded above
+        return pd.DataFrame(columns, index=pd.Index(index, copy=False), copy=False)
+
+    def info(self, key):
+        """The JSON-serializable info saved with a cached frame"""
+        with open(os.path.join(self.path(key), 'meta.json')) as f:
+            return json.load(f)['info']
+
+    def save(self, key, frame, info=None):
+        """Write a frame as one .npy file per column, replacing any partial entry"""
+        entry_dir = self.path(key)
+        tmp_dir = f'{entry_dir}.tmp-{os.getpid()}'
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        meta = {'columns': [], 'info': info or {}}
+        for i, name in enumerate(frame.columns):
+            series = frame[name]
+            column = {'name': name, 'dtype': str(series.dtype)}
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                values = series.cat.codes.to_numpy()
+                column['categories'] = series.cat.categories.tolist()
+                column['ordered'] = bool(series.cat.ordered)
+            elif pd.api.types.is_numeric_dtype(series.dtype):
+                values = series.to_numpy()
+            else:
+                # Store text columns as integer codes plus their vocabulary
+                codes, categories = pd.factorize(series, sort=True)
+                values = codes.astype(np.int32)
+                column['categories'] = categories.tolist()
+                column['ordered'] = False
+            np.save(os.path.join(tmp_dir, f'{i}.npy'), values)
+            meta['columns'].append(column)
+
+        np.save(os.path.join(tmp_dir, 'index.npy'), frame.index.to_numpy())
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+        if os.path.exists(entry_dir):
+            shutil.rmtree(entry_dir)
+        os.replace(tmp_dir, entry_dir)
+        return entry_dir
@@ -0,0 +1,140 @@
+import math
+import numbers
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+class CompiledFeatureProcessor:
+    """Frozen numpy-only replica of a fitted FeatureProcessor for low-latency scoring"""
+
+    def __init__(self, numeric_features, mean, scale, categorical_features, category_columns, sparse=False):
+        self.numeric_features = tuple(numeric_features)
+        self.categorical_features = tuple(categorical_features)
+        self.mean = np.array(mean, dtype=np.float64)
+        self.scale = np.array(scale, dtype=np.float64)
+        self.mean.setflags(write=False)
+        self.scale.setflags(write=False)
+
+        # category -> output column per feature; the dropped category maps to -1
+        self.category_columns = tuple(dict(columns) for columns in category_columns)
+        self.n_features_out = len(self.numeric_features) + sum(
+            sum(1 for index in columns.values() if index >= 0) for columns in self.category_columns
+        )
+
+        # Category code -> output column tables for the vectorized columnar path
+        self.category_indexes = tuple(pd.Index(list(columns)) for columns in self.category_columns)
+        self.category_tables = tuple(np.array(list(columns.values()), dtype=np.intp)
+                                     for columns in self.category_columns)
+        for table in self.category_tables:
+            table.setflags(write=False)
+        # Whether the models behind this processor were trained on its CSR output
+        self.sparse = sparse
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor, numeric_features, categorical_features, sparse=False):
+        """Build lookup tables from a fitted ColumnTransformer"""
+        scaler = preprocessor.named_transformers_['num'].named_steps['scaler']
+        encoder = preprocessor.named_transformers_['cat'].named_steps['onehot']
+        drop_idx = encoder.drop_idx_ if encoder.drop_idx_ is not None else [None] * len(encoder.categories_)
+
+        category_columns = []
+        next_column = len(numeric_features)
+        for categories, dropped in zip(encoder.categories_, drop_idx):
+            columns = {}
+            for i, category in enumerate(categories):
+                if dropped is not None and i == dropped:
+                    columns[category] = -1
+                else:
+                    columns[category] = next_column
+                    next_column += 1
+            category_columns.append(columns)
+
+        return cls(numeric_features, scaler.mean_, scaler.scale_, categorical_features, category_columns,
+                   sparse=sparse)
+
+    def allocate(self, n_rows=1):
+        """Allocate an output buffer that can be reused across calls"""
+        return np.empty((n_rows, self.n_features_out), dtype=np.float64)
+
+    def transform_record(self, record, out=None):
+        """Transform a single record dict into one row of features"""
+        return self.transform_records([record], out=out)
+
+    def transform_records(self, records, out=None):
+        """Transform a list of record dicts into a (n_records, n_features_out) array"""
+        n_rows = len(records)
+        out = self._prepare_out(out, n_rows)
+        n_numeric = len(self.numeric_features)
+
+        numeric = out[:, :n_numeric]
+        for j, feature in enumerate(self.numeric_features):
+            for i, record in enumerate(records):
+                value = record[feature]
+                # None would be stored as NaN and scored as missing; batch cleaning drops such rows instead
+                if isinstance(value, bool) or not isinstance(value, numbers.Real) or not math.isfinite(value):
+                    raise ValueError(f"Found non-numeric value {value!r} in column {feature!r}")
+                numeric[i, j] = value
+        numeric -= self.mean
+        numeric /= self.scale
+
+        for feature, columns in zip(self.categorical_features, self.category_columns):
+            for i, record in enumerate(records):
+                column = columns.get(record[feature])
+                if column is None:
+                    raise ValueError(f"Found unknown category {record[feature]!r} in column {feature!r}")
+                if column >= 0:
+                    out[i, column] = 1.0
+        return out
+
+    def transform_columns(self, columns, out=None):
+        """Transform a columnar batch (DataFrame or mapping of column arrays)"""
+        n_rows = len(columns[self.numeric_features[0]] if self.numeric_features
+                     else columns[self.categorical_features[0]])
+        out = self._prepare_out(out, n_rows)
+
+        if self.numeric_features:
+            values = [np.asarray(columns[feature]) for feature in self.numeric_features]
+            # Mirror sklearn: float32 input is scaled in float32, everything else in float64
+            dtype = np.result_type(*values)
+            if dtype != np.float32:
+                dtype = np.float64
+            numeric = np.empty((n_rows, len(values)), dtype=dtype)
+            for j, value in enumerate(values):
+                numeric[:, j] = value
+            numeric -= self.mean.astype(dtype, copy=False)
+            numeric /= self.scale.astype(dtype, copy=False)
+            out[:, :len(values)] = numeric
+
+        rows = np.arange(n_rows)
+        for feature, index, table in zip(self.categorical_features, self.category_indexes,
+                                         self.category_tables):
+            codes = index.get_indexer(columns[feature])
+            if (codes < 0).any():
+                unknown = pd.unique(np.asarray(columns[feature], dtype=object)[codes < 0])
+                raise ValueError(f"Found unknown categories {list(unknown)} in column {feature!r}")
+            targets = table[codes]
+            hit = targets >= 0
+            out[rows[hit], targets[hit]] = 1.0
+        return out
+
+    def model_input(self, X):
+        """Hand transformed rows to a model in the layout it was trained on
+
+        A model trained in sparse mode saw zeros as absent CSR entries, which
+        XGBoost reads as missing rather than 0, so it must get CSR here too.
+        """
+        if self.sparse:
+            return sparse.csr_matrix(X)
+        return X
+
+    def _prepare_out(self, out, n_rows):
+        """Validate or allocate the output buffer and zero its one-hot block"""
+        if out is None:
+            out = self.allocate(n_rows)
+        elif out.shape[0] < n_rows or out.shape[1] != self.n_features_out:
+            raise ValueError(f"Output buffer of shape {out.shape} cannot hold "
+                             f"({n_rows}, {self.n_features_out})")
+        out = out[:n_rows]
+        out[:, len(self.numeric_features):] = 0.0
+        return out
@@ -1,10 +1,48 @@
+import os
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
+from column_cache import ColumnCache, file_digest
+
+# Declared category sets for the Telco extract; compact mode rejects files with values outside these
+INTERNET_ADDON_LEVELS = ['No', 'No internet service', 'Yes']
+CATEGORY_LEVELS = {
+    'gender': ['Female', 'Male'],
+    'Partner': ['No', 'Yes'],
+    'Dependents': ['No', 'Yes'],
+    'PhoneService': ['No', 'Yes'],
+    'MultipleLines': ['No', 'No phone service', 'Yes'],
+    'InternetService': ['DSL', 'Fiber optic', 'No'],
+    'OnlineSecurity': INTERNET_ADDON_LEVELS,
+    'OnlineBackup': INTERNET_ADDON_LEVELS,
+    'DeviceProtection': INTERNET_ADDON_LEVELS,
+    'TechSupport': INTERNET_ADDON_LEVELS,
+    'StreamingTV': INTERNET_ADDON_LEVELS,
+    'StreamingMovies': INTERNET_ADDON_LEVELS,
+    'Contract': ['Month-to-month', 'One year', 'Two year'],
+    'PaperlessBilling': ['No', 'Yes'],
+    'PaymentMethod': ['Bank transfer (automatic)', 'Credit card (automatic)',
+                      'Electronic check', 'Mailed check'],
+    'Churn': ['No', 'Yes']
+}
+
+# Downcast targets for the numeric columns in compact mode
+COMPACT_NUMERIC_DTYPES = {
+    'SeniorCitizen': np.int8,
+    'tenure': np.int16,
+    'MonthlyCharges': np.float32,
+    'TotalCharges': np.float32
+}
 
 class DataLoader:
-    def __init__(self, file_path):
+    def __init__(self, file_path, cache_dir=None, compact=False):
         self.file_path = file_path
+        self.cache = ColumnCache(cache_dir) if cache_dir else None
+        self.compact = compact
+        self._source_digest = None
+        # Rows read from the source and rows dropped by cleaning in the latest load or chunk pass
+        self.rows_read = 0
+        self.rows_dropped = 0
         self.data = None
         self.X = None
         self.y = None
@@ -15,30 +53,137 @@ class DataLoader:
 
     def load_data(self):
         """Load and preprocess the customer churn data"""
-        # Read the CSV file
-        self.data = pd.read_csv(self.file_path)
+        # Reuse the typed columns from a previous run if the source is unchanged
+        if self.cache is not None:
+            cache_key = self.cache.key(self.source_digest(), self.cleaning_options())
+            self.data = self.cache.load(cache_key)
+            if self.data is not None:
+                # Report what the original read dropped, not the counts of an earlier call
+                counts = self.cache.info(cache_key)
+                self.rows_read, self.rows_dropped = counts['rows_read'], counts['rows_dropped']
+                return self.data
+        
+        # Read the CSV file, skipping the customer ID column entirely
+        self.rows_read = self.rows_dropped = 0
+        self.data = self._clean(pd.read_csv(self.file_path, usecols=self._usecols(),
+                                            dtype=self._read_dtypes()))
         
+        if self.cache is not None:
+            self.cache.save(cache_key, self.data,
+                            info={'rows_read': self.rows_read, 'rows_dropped': self.rows_dropped})
+            
+        return self.data
+
+    def iter_chunks(self, chunk_size=100000, keep_id=False):
+        """Yield cleaned chunks of the CSV so peak memory depends on chunk_size"""
+        reader = pd.read_csv(self.file_path, usecols=self._usecols(keep_id),
+                             dtype=self._read_dtypes(), chunksize=chunk_size)
+        self.rows_read = self.rows_dropped = 0
+        with reader:
+            for chunk in reader:
+                chunk = self._clean(chunk)
+                if len(chunk):
+                    yield chunk
+
+    def write_chunks(self, store_dir, chunk_size=100000, keep_id=False):
+        """Stream the CSV into a directory of binary chunk files, replacing any previous store"""
+        os.makedirs(store_dir, exist_ok=True)
+        # iter_store reads every part, so parts left from an earlier write would be read back as duplicates
+        for name in self._store_parts(store_dir):
+            os.remove(os.path.join(store_dir, name))
+        paths = []
+        total_rows = 0
+        for i, chunk in enumerate(self.iter_chunks(chunk_size, keep_id=keep_id)):
+            path = os.path.join(store_dir, f'part-{i:05d}.pkl')
+            chunk.to_pickle(path)
+            paths.append(path)
+            total_rows += len(chunk)
+        return {'paths': paths, 'rows': total_rows}
+
+    @staticmethod
+    def iter_store(store_dir):
+        """Yield the chunks previously written by write_chunks"""
+        for name in DataLoader._store_parts(store_dir):
+            yield pd.read_pickle(os.path.join(store_dir, name))
+
+    @staticmethod
+    def _store_parts(store_dir):
+        return sorted(name for name in os.listdir(store_dir)
+                      if name.startswith('part-') and name.endswith('.pkl'))
+
+    def source_digest(self):
+        """SHA-256 of the source file, computed once per loader"""
+        if self._source_digest is None:
+            self._source_digest = file_digest(self.file_path)
+        return self._source_digest
+
+    def cleaning_options(self):
+        """Cleaning options that determine the loaded frame contents"""
+        return {
+            'drop_id': True,
+            'numeric_coercion': ['TotalCharges'],
+            'dropna': True,
+            'compact': self.compact
+        }
+
+    def _read_dtypes(self):
+        """Parse declared categorical columns straight into compact categoricals"""
+        if not self.compact:
+            return None
+        # Levels are checked against CATEGORY_LEVELS after parsing; fixed levels would turn strays into NaN
+        return {column: 'category' for column in CATEGORY_LEVELS}
+
+    @staticmethod
+    def _usecols(keep_id=False):
+        """Column filter for read_csv that drops the customer ID unless requested"""
+        if keep_id:
+            return None
+        return lambda column: column != 'customerID'
+
+    def _clean(self, frame):
+        """Coerce TotalCharges and drop incomplete rows with a single copy"""
         # Convert TotalCharges to numeric, handling any errors
-        self.data['TotalCharges'] = pd.to_numeric(self.data['TotalCharges'], errors='coerce')
+        if 'TotalCharges' in frame.columns:
+            frame['TotalCharges'] = pd.to_numeric(frame['TotalCharges'], errors='coerce')
+        if self.compact:
+            frame = self._conform_categories(frame)
         
         # Drop rows with missing values
-        self.data = self.data.dropna()
+        valid = frame.notna().all(axis=1)
+        self.rows_read += len(frame)
+        if not valid.all():
+            self.rows_dropped += int((~valid).sum())
+            frame = frame.loc[valid]
         
-        # Remove customer ID column if it exists
-        if 'customerID' in self.data.columns:
-            self.data = self.data.drop('customerID', axis=1)
-            
-        return self.data
+        # Downcast numeric columns once the missing values are gone
+        if self.compact:
+            frame = frame.astype({column: dtype for column, dtype in COMPACT_NUMERIC_DTYPES.items()
+                                  if column in frame.columns})
+        return frame
+
+    @staticmethod
+    def _conform_categories(frame):
+        """Give every declared categorical column its declared levels, refusing unexpected values"""
+        for column, levels in CATEGORY_LEVELS.items():
+            if column not in frame.columns:
+                continue
+            unknown = frame[column].cat.categories.difference(levels)
+            if len(unknown):
+                count = int(frame[column].isin(unknown).sum())
+                raise ValueError(f"Found {count:,} rows with unknown categories {list(unknown)} in column "
+                                 f"{column!r}; extend CATEGORY_LEVELS or load without compact=True")
+            frame[column] = frame[column].cat.set_categories(levels)
+        return frame
 
     def prepare_features(self):
         """Prepare features and target variable"""
         # Separate features and target
-        self.y = self.data['Churn'].map({'Yes': 1, 'No': 0})
+        self.y = self.data['Churn'].map({'Yes': 1, 'No': 0}).astype(int)
         self.X = self.data.drop('Churn', axis=1)
         
         # Get categorical and numeric columns
-        self.categorical_cols = self.X.select_dtypes(include=['object']).columns
-        self.numeric_cols = self.X.select_dtypes(include=['int64', 'float64']).columns
+        self.categorical_cols = self.X.select_dtypes(include=['object', 'category']).columns
+        self.numeric_cols = self.X.select_dtypes(include='number').columns
         
         return self.X, self.y
 
@@ -0,0 +1,58 @@
+import weakref
+import numpy as np
+import pandas as pd
+
+SERVICE_COLUMNS = ['PhoneService', 'InternetService', 'OnlineSecurity',
+                   'OnlineBackup', 'DeviceProtection', 'TechSupport']
+
+class DerivedFeatures:
+    """Lazily computed derived columns, built once per dataset and shared read-only
+
+    The source frame is never modified; consumers index the store by column
+    name (e.g. derived['NumberOfServices']) and get a Series aligned with it.
+    """
+
+    _instances = weakref.WeakValueDictionary()
+
+    def __init__(self, data):
+        self.data = data
+        self._cache = {}
+        self._builders = {
+            'tenure_segment': lambda: pd.qcut(self.data['tenure'], q=4,
+                                              labels=['New', 'Early', 'Established', 'Loyal']),
+            'TenureBin': lambda: pd.qcut(self.data['tenure'], q=5),
+            'ChargesBin': lambda: pd.qcut(self.data['MonthlyCharges'], q=5),
+            'MonthlyChargesQuartile': lambda: pd.qcut(self.data['MonthlyCharges'], 4),
+            'ServiceSubscriptions': lambda: (self.data[SERVICE_COLUMNS] == 'Yes').astype(int),
+            'ActiveServices': lambda: self.data[SERVICE_COLUMNS] != 'No',
+            'NumberOfServices': lambda: self['ActiveServices'].sum(axis=1),
+            'CustomerValue': lambda: self.data['MonthlyCharges'] * self.data['tenure'],
+            'Churned': lambda: (self.data['Churn'] == 'Yes').astype(int)
+        }
+
+    @classmethod
+    def for_data(cls, data):
+        """Return the store shared by every consumer of this DataFrame"""
+        derived = cls._instances.get(id(data))
+        if derived is None or derived.data is not data:
+            derived = cls(data)
+            cls._instances[id(data)] = derived
+        return derived
+
+    def __getitem__(self, name):
+        if name not in self._cache:
+            if name not in self._builders:
+                raise KeyError(f"Unknown derived feature: {name}")
+            value = self._builders[name]()
+            if isinstance(value, pd.Series):
+                value = value.rename(name)
+            self._cache[name] = self._freeze(value)
+        return self._cache[name]
+
+    @staticmethod
+    def _freeze(value):
+        """Mark numpy-backed values read-only so no consumer can alter the shared copy"""
+        values = value.values
+        if isinstance(values, np.ndarray):
+            values.flags.writeable = False
+        return value
@@ -0,0 +1,97 @@
+import numpy as np
+
+
+def binary_confusion_matrix(y_true, y_pred):
+    """2x2 confusion matrix (rows: true label, columns: predicted) from one bincount"""
+    return np.bincount(2 * y_true + y_pred, minlength=4).reshape(2, 2)
+
+
+def _tie_groups(sorted_scores):
+    """Start offsets of the runs of equal scores in a sorted array"""
+    return np.r_[0, np.flatnonzero(np.diff(sorted_scores)) + 1]
+
+
+def _auc_from_group_counts(positives, negatives):
+    """Mann-Whitney AUC from per-tie-group positive/negative weights (last axis = groups)"""
+    negatives_below = np.cumsum(negatives, axis=-1) - negatives
+    concordant = np.sum(positives * (negatives_below + 0.5 * negatives), axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return concordant / (positives.sum(axis=-1) * negatives.sum(axis=-1))
+
+
+def roc_auc_from_scores(y_true, scores):
+    """ROC AUC from a single sort of the scores, with ties counted as half"""
+    order = np.argsort(scores, kind='mergesort')
+    starts = _tie_groups(scores[order])
+    labels = y_true[order].astype(np.float64)
+    positives = np.add.reduceat(labels, starts)
+    negatives = np.add.reduceat(1.0 - labels, starts)
+    return float(_auc_from_group_counts(positives, negatives))
+
+
+def classification_report_from_confusion(confusion, digits=2):
+    """Render a binary confusion matrix in the layout of sklearn's classification_report"""
+    true_counts = confusion.sum(axis=1)
+    predicted_counts = confusion.sum(axis=0)
+    hits = np.diag(confusion).astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        precision = np.nan_to_num(hits / predicted_counts)
+        recall = np.nan_to_num(hits / true_counts)
+        f1 = np.nan_to_num(2 * precision * recall / (precision + recall))
+    support = int(true_counts.sum())
+    weights = true_counts / support
+
+    headers = ["precision", "recall", "f1-score", "support"]
+    width = max(len("weighted avg"), digits)
+    row_fmt = "{:>{width}s} " + " {:>9.{digits}f}" * 3 + " {:>9}\n"
+    report = ("{:>{width}s} " + " {:>9}" * len(headers)).format("", *headers, width=width)
+    report += "\n\n"
+    for label in range(2):
+        report += row_fmt.format(str(label), precision[label], recall[label], f1[label],
+                                 int(true_counts[label]), width=width, digits=digits)
+    report += "\n"
+    report += ("{:>{width}s} " + " {:>9.{digits}}" * 2 + " {:>9.{digits}f}" + " {:>9}\n").format(
+        "accuracy", "", "", hits.sum() / support, support, width=width, digits=digits
+    )
+    report += row_fmt.format("macro avg", precision.mean(), recall.mean(), f1.mean(), support,
+                             width=width, digits=digits)
+    report += row_fmt.format("weighted avg", precision @ weights, recall @ weights, f1 @ weights,
+                             support, width=width, digits=digits)
+    return report
+
+
+def bootstrap_confidence_intervals(y_true, scores, threshold=0.5, n_bootstrap=1000, alpha=0.05,
+                                   random_state=42, batch_size=256):
+    """Percentile bootstrap intervals for accuracy and ROC AUC
+
+    Each block of replicates is a (batch, n) matrix of resampling counts laid
+    out in score order, so every replicate's AUC falls out of the same sorted
+    pass used for the point estimate.
+    """
+    rng = np.random.default_rng(random_state)
+    n_samples = len(y_true)
+    order = np.argsort(scores, kind='mergesort')
+    position = np.empty(n_samples, dtype=np.intp)
+    position[order] = np.arange(n_samples)
+    starts = _tie_groups(scores[order])
+    labels = y_true[order].astype(np.float64)
+    correct = ((scores[order] > threshold).astype(int) == y_true[order]).astype(np.float64)
+
+    accuracies = []
+    aucs = []
+    for batch_start in range(0, n_bootstrap, batch_size):
+        n_batch = min(batch_size, n_bootstrap - batch_start)
+        draws = position[rng.integers(0, n_samples, size=(n_batch, n_samples))]
+        offsets = np.arange(n_batch)[:, None] * n_samples
+        weights = np.bincount((draws + offsets).ravel(),
+                              minlength=n_batch * n_samples).reshape(n_batch, n_samples)
+        accuracies.append(weights @ correct / n_samples)
+        positives = np.add.reduceat(weights * labels, starts, axis=1)
+        negatives = np.add.reduceat(weights * (1.0 - labels), starts, axis=1)
+        aucs.append(_auc_from_group_counts(positives, negatives))
+
+    bounds = [100 * alpha / 2, 100 * (1 - alpha / 2)]
+    return {
+        'accuracy_ci': tuple(np.nanpercentile(np.concatenate(accuracies), bounds)),
+        'roc_auc_ci': tuple(np.nanpercentile(np.concatenate(aucs), bounds))
+    }
@@ -1,13 +1,27 @@
 import numpy as np
+import pandas as pd
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
+from compiled_processor import CompiledFeatureProcessor
 
 class FeatureProcessor:
-    def __init__(self, categorical_features, numeric_features):
+    """Scales numeric and one-hot encodes categorical features, as dense arrays or CSR
+
+    Sparse mode is not a drop-in replacement for dense mode with XGBoost:
+    zeros are left out of CSR output and XGBoost treats absent entries as
+    missing, so a model trained on CSR learns different splits and must be
+    scored with CSR. The compiled processor's model_input does that.
+    """
+
+    def __init__(self, categorical_features, numeric_features, sparse=False):
         self.categorical_features = categorical_features
         self.numeric_features = numeric_features
+        self.sparse = sparse
         self.preprocessor = None
+        self._partial_scaler = None
+        self._partial_categories = None
+        self._partial_template = None
 
     def create_preprocessor(self):
         """Create preprocessing pipeline for both numeric and categorical features"""
@@ -16,14 +30,16 @@ class FeatureProcessor:
         ])
 
         categorical_transformer = Pipeline(steps=[
-            ('onehot', OneHotEncoder(drop='first', sparse_output=False))
+            ('onehot', OneHotEncoder(drop='first', sparse_output=self.sparse))
         ])
 
+        # In sparse mode always emit CSR, whatever the density of the stacked output
         self.preprocessor = ColumnTransformer(
             transformers=[
                 ('num', numeric_transformer, self.numeric_features),
                 ('cat', categorical_transformer, self.categorical_features)
-            ])
+            ],
+            sparse_threshold=1.0 if self.sparse else 0.0)
         
         return self.preprocessor
 
@@ -33,12 +49,61 @@ class FeatureProcessor:
             self.create_preprocessor()
         return self.preprocessor.fit_transform(X_train)
 
+    def partial_fit(self, X_chunk):
+        """Update running scaler statistics and category sets from one chunk"""
+        if self._partial_scaler is None:
+            self._partial_scaler = StandardScaler()
+            self._partial_categories = {feature: set() for feature in self.categorical_features}
+            used = set(self.numeric_features) | set(self.categorical_features)
+            self._partial_template = X_chunk[[c for c in X_chunk.columns if c in used]].head(1)
+        
+        # StandardScaler.partial_fit merges chunk moments with Chan et al.'s stable update
+        self._partial_scaler.partial_fit(X_chunk[self.numeric_features])
+        for feature in self.categorical_features:
+            self._partial_categories[feature].update(pd.unique(X_chunk[feature].dropna()))
+        return self
+
+    def finalize_fit(self):
+        """Build a fitted preprocessor from the statistics gathered by partial_fit"""
+        if self._partial_scaler is None:
+            raise ValueError("No chunks seen. Call partial_fit first.")
+        
+        # Fit on a tiny frame that contains every category, then swap in the streamed scaler moments
+        levels = {feature: sorted(values) for feature, values in self._partial_categories.items()}
+        n_rows = max([len(values) for values in levels.values()] + [1])
+        prototype = self._partial_template.iloc[[0] * n_rows].reset_index(drop=True)
+        for feature, values in levels.items():
+            cycled = [values[i % len(values)] for i in range(n_rows)]
+            if isinstance(prototype[feature].dtype, pd.CategoricalDtype):
+                cycled = pd.Categorical(cycled, categories=prototype[feature].cat.categories)
+            prototype[feature] = cycled
+        
+        self.create_preprocessor()
+        self.preprocessor.fit(prototype)
+        
+        scaler = self.preprocessor.named_transformers_['num'].named_steps['scaler']
+        for attribute in ('mean_', 'var_', 'scale_', 'n_samples_seen_'):
+            setattr(scaler, attribute, getattr(self._partial_scaler, attribute))
+        
+        self._partial_scaler = None
+        self._partial_categories = None
+        self._partial_template = None
+        return self
+
     def transform(self, X_test):
         """Transform the test data"""
         if self.preprocessor is None:
             raise ValueError("Preprocessor not fitted. Call fit_transform first.")
         return self.preprocessor.transform(X_test)
 
+    def compile(self):
+        """Freeze the fitted preprocessor into a numpy-only row transformer"""
+        if self.preprocessor is None:
+            raise ValueError("Preprocessor not fitted. Call fit_transform first.")
+        return CompiledFeatureProcessor.from_preprocessor(
+            self.preprocessor, self.numeric_features, self.categorical_features, sparse=self.sparse
+        )
+
     def get_feature_names(self):
         """Get the names of transformed features"""
         if self.preprocessor is None:
@@ -0,0 +1,158 @@
+import inspect
+import os
+import time
+import tracemalloc
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
+from render_cache import RenderCache, value_digest, style_digest
+from profiler import profiler
+from pipeline import process_context
+
+# One figure job: which analyzer builds it, the plot method, output file(s) and extra arguments
+RenderJob = namedtuple('RenderJob', ['source', 'method', 'filenames', 'args', 'dataset'],
+                       defaults=((), 'all'))
+
+_worker_datasets = None
+_worker_aggregate = False
+_worker_plotters = {}
+_worker_trace_memory = False
+
+
+def _init_worker(datasets, aggregate=False, trace_memory=False):
+    """Give each worker the datasets once and switch it to the non-interactive Agg backend"""
+    global _worker_datasets, _worker_aggregate, _worker_trace_memory
+    matplotlib.use('Agg')
+    _worker_datasets = datasets
+    _worker_aggregate = aggregate
+    _worker_plotters.clear()
+    _worker_trace_memory = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def _plotter_class(source):
+    from visualizer import Visualizer
+    from advanced_analyzer import AdvancedAnalyzer
+
+    if source == 'visualizer':
+        return Visualizer
+    if source == 'advanced':
+        return AdvancedAnalyzer
+    raise ValueError(f"Unknown figure source: {source}")
+
+
+def _plotter(source, dataset):
+    """Reuse one analyzer per dataset in a worker so derived features are computed once"""
+    key = (source, dataset)
+    if key not in _worker_plotters:
+        data = _worker_datasets[dataset]
+        if source == 'visualizer':
+            _worker_plotters[key] = _plotter_class(source)(data, aggregate=_worker_aggregate)
+        else:
+            _worker_plotters[key] = _plotter_class(source)(data, None, None)
+    return _worker_plotters[key]
+
+
+def _render_job(job, output_dir):
+    """Build, save and close the figure(s) for one job; only paths and timings go back"""
+    import matplotlib.pyplot as plt
+
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    if _worker_trace_memory:
+        tracemalloc.reset_peak()
+    # rc_context undoes any style changes a plot method makes, so jobs cannot leak into each other
+    with matplotlib.rc_context():
+        figures = getattr(_plotter(job.source, job.dataset), job.method)(*job.args)
+        if not isinstance(figures, (list, tuple)):
+            figures = [figures]
+        paths = []
+        for figure, filename in zip(figures, job.filenames):
+            path = os.path.join(output_dir, filename)
+            figure.savefig(path)
+            paths.append(path)
+        for figure in figures:
+            plt.close(figure)
+    return {
+        'job': f'{job.source}.{job.method}',
+        'dataset': job.dataset,
+        'paths': paths,
+        'seconds': time.perf_counter() - start,
+        'started': start,
+        'cpu_seconds': time.process_time() - cpu_start,
+        'peak_memory_bytes': tracemalloc.get_traced_memory()[1] if _worker_trace_memory else None,
+        'pid': os.getpid(),
+        'cached': False
+    }
+
+
+class FigureRenderer:
+    def __init__(self, datasets, output_dir, n_workers=None, aggregate=False, cache=True):
+        self.datasets = datasets
+        self.output_dir = output_dir
+        self.n_workers = n_workers
+        # Passed to Visualizer; AdvancedAnalyzer jobs take it as a plot argument
+        self.aggregate = aggregate
+        self.cache = cache
+
+    def job_key(self, job):
+        """Hash of the columns a plot reads, its arguments and the styling it is drawn with"""
+        import plot_aggregates
+        import derived_features
+        import segment_engine
+
+        plotter_class = _plotter_class(job.source)
+        data = self.datasets[job.dataset]
+        columns = plotter_class.PLOT_COLUMNS.get(job.method)
+        inputs = data if columns is None else data[columns]
+        # Every module that shapes the plotted values: the plotter, its drawing helpers, the derived
+        # features (tenure bins, service counts) and the segment codes behind the aggregates
+        source_files = [inspect.getsourcefile(module) for module in
+                        (plotter_class, plot_aggregates, derived_features, segment_engine)]
+        return value_digest([job.source, job.method, list(job.filenames), job.args, self.aggregate,
+                             value_digest(inputs), style_digest(source_files)])
+
+    def render(self, jobs):
+        """Render every job whose inputs changed in worker processes"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        render_cache = RenderCache(self.output_dir) if self.cache else None
+
+        results = {}
+        pending = []
+        keys = {}
+        for i, job in enumerate(jobs):
+            paths = [os.path.join(self.output_dir, filename) for filename in job.filenames]
+            name = f'{job.dataset}:{job.source}.{job.method}:{",".join(job.filenames)}'
+            if render_cache is not None:
+                keys[i] = (name, self.job_key(job))
+                if render_cache.is_current(name, keys[i][1], paths):
+                    results[i] = {'job': f'{job.source}.{job.method}', 'dataset': job.dataset, 'paths': paths,
+                                  'seconds': 0.0, 'pid': os.getpid(), 'cached': True}
+                    continue
+            pending.append(i)
+
+        for i, result in zip(pending, self._render_jobs([jobs[i] for i in pending])):
+            results[i] = result
+            if render_cache is not None:
+                render_cache.record(keys[i][0], keys[i][1], result['paths'])
+        if render_cache is not None and pending:
+            render_cache.save()
+        return [results[i] for i in range(len(jobs))]
+
+    def _render_jobs(self, jobs):
+        if not jobs:
+            return []
+        # Even a single job goes to a worker: pyplot state, the Agg backend switch and the plotters'
+        # copies of the data stay out of the parent, which may be rendering from several threads
+        n_workers = self.n_workers or min(len(jobs), os.cpu_count() or 1)
+        trace_memory = profiler.enabled and profiler.trace_memory
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=process_context, initializer=_init_worker,
+                                 initargs=(self.datasets, self.aggregate, trace_memory)) as executor:
+            futures = [executor.submit(_render_job, job, self.output_dir) for job in jobs]
+            results = [future.result() for future in futures]
+        for job, result in zip(jobs, results):
+            profiler.add_event(f'plot.{job.method}', 'plot', result['started'], result['seconds'],
+                               process_cpu_seconds=result['cpu_seconds'], rows=len(self.datasets[job.dataset]),
+                               peak_memory_bytes=result['peak_memory_bytes'], pid=result['pid'], tid=result['pid'])
+        return results
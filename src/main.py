@@ -1,112 +1,265 @@
+import argparse
+import sklearn
+import xgboost
 from data_loader import DataLoader
 from feature_processor import FeatureProcessor
 from model_trainer import ModelTrainer
-from visualizer import Visualizer
+from figure_renderer import FigureRenderer, RenderJob
 from business_analyzer import BusinessAnalyzer
 from report_generator import ReportGenerator
+from artifact_store import ArtifactStore
+from pipeline import Stage, PipelineExecutor, log
+from profiler import profiler
 
-def main():
-    # Initialize data loader
-    data_loader = DataLoader('data/WA_Fn-UseC_-Telco-Customer-Churn.csv')
-    
+DATA_PATH = 'data/WA_Fn-UseC_-Telco-Customer-Churn.csv'
+VIZ_PATH = 'output/visualizations/'
+REPORT_PATH = 'output/reports/churn_analysis_report.md'
+
+# Fitted artifacts are reused when the data, split and hyperparameters are unchanged
+artifact_store = ArtifactStore('output/artifacts')
+split_params = {'test_size': 0.2, 'random_state': 42}
+feature_params = {'sparse': False}
+# Pickled estimators are only safe to reload under the library versions that fitted them
+library_versions = {'sklearn': sklearn.__version__, 'xgboost': xgboost.__version__}
+n_bootstrap = 1000
+aggregate_plot_rows = 1000000
+retention_budget = 25000
+# Cores for fitting the models side by side in worker processes; None trains them one after another
+train_cores = None
+
+def load_stage():
     # Load and prepare data
-    print("Loading and preparing data...")
-    data = data_loader.load_data()
-    X, y = data_loader.prepare_features()
-    X_train, X_test, y_train, y_test = data_loader.split_data()
-    
-    # Get feature names
-    feature_info = data_loader.get_feature_names()
-    
+    log("Loading and preparing data...")
+    data_loader = DataLoader(DATA_PATH, cache_dir='output/cache')
+    with profiler.span('load.read', 'step') as span:
+        data = data_loader.load_data()
+        span.rows = len(data)
+    with profiler.span('load.prepare_features', 'step', rows=len(data)):
+        X, y = data_loader.prepare_features()
+    with profiler.span('load.split', 'step', rows=len(X)):
+        X_train, X_test, y_train, y_test = data_loader.split_data(**split_params)
+    profiler.set_rows(len(data))
+    return {
+        'data': data, 'X': X, 'y': y,
+        'X_train': X_train, 'X_test': X_test, 'y_train': y_train, 'y_test': y_test,
+        'feature_info': data_loader.get_feature_names(),
+        # What the fitted artifacts depend on besides the feature lists
+        'data_fingerprint': [data_loader.source_digest(), data_loader.cleaning_options(), split_params]
+    }
+
+def preprocess_stage(X_train, feature_info, data_fingerprint):
     # Process features
-    print("Processing features...")
-    feature_processor = FeatureProcessor(
-        categorical_features=feature_info['categorical'],
-        numeric_features=feature_info['numeric']
-    )
-    
-    X_train_processed = feature_processor.fit_transform(X_train)
-    X_test_processed = feature_processor.transform(X_test)
-    
-    # Train and evaluate models
-    print("Training models...")
+    log("Processing features...")
+    preprocessor_key = ArtifactStore.make_key(*data_fingerprint, feature_info, feature_params, library_versions)
+    profiler.set_rows(len(X_train))
+    feature_processor = artifact_store.load('preprocessor', preprocessor_key)
+    if feature_processor is None:
+        feature_processor = FeatureProcessor(
+            categorical_features=feature_info['categorical'],
+            numeric_features=feature_info['numeric'],
+            **feature_params
+        )
+        feature_processor.fit_transform(X_train)
+        artifact_store.save('preprocessor', preprocessor_key, feature_processor)
+    return {'feature_processor': feature_processor, 'preprocessor_key': preprocessor_key}
+
+def train_stage(feature_processor, X_train, y_train, preprocessor_key):
+    # Train models
+    log("Training models...")
+    profiler.set_rows(len(X_train))
     model_trainer = ModelTrainer()
-    model_trainer.train_models(X_train_processed, y_train)
-    
-    print("Evaluating models...")
-    evaluation_results = model_trainer.evaluate_models(X_test_processed, y_test)
-    
-    # Get feature importance
-    feature_names = feature_processor.get_feature_names()
-    feature_importance = model_trainer.get_feature_importance(feature_names)
-    
-    # Create visualizations
-    print("Creating visualizations...")
-    visualizer = Visualizer(data)
-    
-    # Plot and save visualizations
-    viz_path = 'output/visualizations/'
-    feature_importance_plot = visualizer.plot_feature_importance(feature_importance)
-    feature_importance_plot.savefig(f'{viz_path}feature_importance.png')
-    
-    lifecycle_plot = visualizer.plot_customer_lifecycle()
-    lifecycle_plot.savefig(f'{viz_path}customer_lifecycle.png')
-    
-    churn_analysis_plot = visualizer.plot_churn_analysis()
-    churn_analysis_plot.savefig(f'{viz_path}churn_analysis.png')
-    
-    correlation_plot = visualizer.plot_correlation_matrix()
-    correlation_plot.savefig(f'{viz_path}correlation_matrix.png')
-    
-    # Process all data for business analysis
-    all_data_processed = feature_processor.transform(X)
-    
-    # Perform business analysis
-    print("Performing business analysis...")
+    model_key = ArtifactStore.make_key(preprocessor_key, model_trainer.get_hyperparameters(), library_versions)
+    trained_models = artifact_store.load('models', model_key)
+    if trained_models is None:
+        model_trainer.train_models(feature_processor.transform(X_train), y_train,
+                                   parallel=train_cores is not None, n_jobs=train_cores)
+        artifact_store.save('models', model_key, model_trainer.trained_models)
+    else:
+        log("Loaded trained models from the artifact store")
+        model_trainer.models.update(trained_models)
+        model_trainer.trained_models = trained_models
+    return {'model_trainer': model_trainer, 'model_key': model_key}
+
+def evaluate_stage(model_trainer, feature_processor, X_test, y_test, model_key):
+    log("Evaluating models...")
+    profiler.set_rows(len(X_test))
+    evaluation_key = ArtifactStore.make_key(model_key, {'n_bootstrap': n_bootstrap})
+    evaluation_results = artifact_store.get_or_create(
+        'evaluation', evaluation_key,
+        lambda: model_trainer.evaluate_models(feature_processor.transform(X_test), y_test,
+                                              n_bootstrap=n_bootstrap)
+    )
+    return {'evaluation_results': evaluation_results}
+
+def render(data, jobs):
+    """Render figures in worker processes (from summaries on large data) and report each one"""
+    profiler.set_rows(len(data))
+    renderer = FigureRenderer({'all': data}, VIZ_PATH, aggregate=len(data) > aggregate_plot_rows)
+    render_results = renderer.render(jobs)
+    for result in render_results:
+        if result['cached']:
+            log(f"Reused {', '.join(result['paths'])} (inputs unchanged)")
+        else:
+            log(f"Rendered {', '.join(result['paths'])} in {result['seconds']:.2f}s")
+    return render_results
+
+def data_figures_stage(data):
+    # These figures only need the data, so they render while models train
+    log("Creating visualizations...")
+    return {'data_figures': render(data, [
+        RenderJob('visualizer', 'plot_customer_lifecycle', ['customer_lifecycle.png']),
+        RenderJob('visualizer', 'plot_churn_analysis', ['churn_analysis.png']),
+        RenderJob('visualizer', 'plot_correlation_matrix', ['correlation_matrix.png'])
+    ])}
+
+def importance_figure_stage(data, model_trainer, feature_processor):
+    feature_importance = model_trainer.get_feature_importance(feature_processor.get_feature_names())
+    return {'importance_figure': render(data, [
+        RenderJob('visualizer', 'plot_feature_importance', ['feature_importance.png'], (feature_importance,))
+    ])}
+
+def business_stage(data, X, model_trainer, feature_processor):
+    # Perform business analysis on all data
+    log("Performing business analysis...")
+    profiler.set_rows(len(data))
     best_model = model_trainer.trained_models['xgboost']  # Using XGBoost as our best model
-    business_analyzer = BusinessAnalyzer(data, best_model, all_data_processed)
-    business_metrics = business_analyzer.calculate_business_metrics()
-    high_risk_segments = business_analyzer.identify_high_risk_segments()
-    recommendations = business_analyzer.generate_recommendations()
-    
-    # Print results
-    print("\nModel Evaluation Results:")
-    for model_name, results in evaluation_results.items():
-        print(f"\n{model_name.capitalize()} Model:")
-        print(f"Accuracy: {results['accuracy']:.4f}")
-        print(f"ROC AUC: {results['roc_auc']:.4f}")
-        print("\nClassification Report:")
-        print(results['classification_report'])
+    business_analyzer = BusinessAnalyzer(data, best_model, feature_processor.transform(X))
+    with profiler.span('business.metrics', 'step', rows=len(data)):
+        business_metrics = business_analyzer.calculate_business_metrics()
+    with profiler.span('business.segments', 'step', rows=len(data)):
+        high_risk_segments = business_analyzer.identify_high_risk_segments()
+    with profiler.span('business.recommendations', 'step', rows=len(data)):
+        recommendations = business_analyzer.generate_recommendations()
+    return {
+        'business_analyzer': business_analyzer,
+        'business_metrics': business_metrics,
+        'high_risk_segments': high_risk_segments,
+        'recommendations': recommendations
+    }
+
+def churn_cube_stage(business_analyzer):
+    # Precompute the segment cube analysts drill into
+    path = 'output/artifacts/churn_cube.npz'
+    profiler.set_rows(len(business_analyzer.data))
+    business_analyzer.build_churn_cube().save(path)
+    return {'churn_cube_path': path}
+
+def retention_stage(business_analyzer):
+    # Pick the customers to contact within the retention budget
+    profiler.set_rows(len(business_analyzer.data))
+    return {'retention_plan': business_analyzer.plan_retention_campaign(retention_budget)}
+
+def report_stage(evaluation_results, business_metrics, high_risk_segments, recommendations):
+    # Stream the detailed report, with JSON and CSV companions written in the same pass
+    with open(REPORT_PATH, 'w') as markdown, \
+            open('output/reports/churn_analysis_report.json', 'w') as json_file, \
+            open('output/reports/churn_analysis_report.csv', 'w', newline='') as csv_file:
+        ReportGenerator.write_report(
+            markdown,
+            evaluation_results, 
+            business_metrics, 
+            high_risk_segments, 
+            recommendations,
+            json_file=json_file,
+            csv_file=csv_file
+        )
+    return {'report_path': REPORT_PATH}
+
+STAGES = [
+    Stage('load', load_stage, [],
+          ['data', 'X', 'y', 'X_train', 'X_test', 'y_train', 'y_test', 'feature_info', 'data_fingerprint']),
+    Stage('preprocess', preprocess_stage, ['X_train', 'feature_info', 'data_fingerprint'],
+          ['feature_processor', 'preprocessor_key']),
+    Stage('train', train_stage, ['feature_processor', 'X_train', 'y_train', 'preprocessor_key'],
+          ['model_trainer', 'model_key']),
+    Stage('evaluate', evaluate_stage, ['model_trainer', 'feature_processor', 'X_test', 'y_test', 'model_key'],
+          ['evaluation_results']),
+    Stage('data_figures', data_figures_stage, ['data'], ['data_figures']),
+    Stage('importance_figure', importance_figure_stage, ['data', 'model_trainer', 'feature_processor'],
+          ['importance_figure']),
+    Stage('business', business_stage, ['data', 'X', 'model_trainer', 'feature_processor'],
+          ['business_analyzer', 'business_metrics', 'high_risk_segments', 'recommendations']),
+    Stage('churn_cube', churn_cube_stage, ['business_analyzer'], ['churn_cube_path']),
+    Stage('retention', retention_stage, ['business_analyzer'], ['retention_plan']),
+    Stage('report', report_stage,
+          ['evaluation_results', 'business_metrics', 'high_risk_segments', 'recommendations'], ['report_path'])
+]
+
+def print_results(results):
+    """Print whatever the executed stages produced, in a fixed order"""
+    if 'evaluation_results' in results:
+        print("\nModel Evaluation Results:")
+        for model_name, model_results in results['evaluation_results'].items():
+            print(f"\n{model_name.capitalize()} Model:")
+            print(f"Accuracy: {model_results['accuracy']:.4f} (95% CI {model_results['accuracy_ci'][0]:.4f}-{model_results['accuracy_ci'][1]:.4f})")
+            print(f"ROC AUC: {model_results['roc_auc']:.4f} (95% CI {model_results['roc_auc_ci'][0]:.4f}-{model_results['roc_auc_ci'][1]:.4f})")
+            print("\nClassification Report:")
+            print(model_results['classification_report'])
     
-    print("\nBusiness Metrics:")
-    for metric, value in business_metrics.items():
-        print(f"{metric}: {value:,.2f}")
+    if 'business_metrics' in results:
+        print("\nBusiness Metrics:")
+        for metric, value in results['business_metrics'].items():
+            print(f"{metric}: {value:,.2f}")
+            
+        print("\nHigh Risk Segments:")
+        for segment_type, probabilities in results['high_risk_segments'].items():
+            print(f"\n{segment_type.replace('_', ' ').title()}:")
+            for category, prob in probabilities.items():
+                print(f"{category}: {prob:.2%} churn probability")
         
-    print("\nHigh Risk Segments:")
-    for segment_type, probabilities in high_risk_segments.items():
-        print(f"\n{segment_type.replace('_', ' ').title()}:")
-        for category, prob in probabilities.items():
-            print(f"{category}: {prob:.2%} churn probability")
+        print("\nBusiness Recommendations:")
+        for rec in results['recommendations']:
+            print(f"\nArea: {rec['area']}")
+            print(f"Finding: {rec['finding']}")
+            print(f"Recommendation: {rec['recommendation']}")
+            print(f"Potential Impact: {rec['potential_impact']}")
     
-    print("\nBusiness Recommendations:")
-    for rec in recommendations:
-        print(f"\nArea: {rec['area']}")
-        print(f"Finding: {rec['finding']}")
-        print(f"Recommendation: {rec['recommendation']}")
-        print(f"Potential Impact: {rec['potential_impact']}")
-        
-    # Generate and save detailed report
-    report = ReportGenerator.generate_report(
-        evaluation_results, 
-        business_metrics, 
-        high_risk_segments, 
-        recommendations
-    )
+    if 'retention_plan' in results:
+        retention_plan = results['retention_plan']
+        print(f"\nRetention Campaign (budget ${retention_budget:,}):")
+        print(f"Customers to contact: {len(retention_plan):,} for ${retention_plan['cost'].sum():,.2f}")
+        print(f"Expected retained value: ${retention_plan['expected_value'].sum():,.2f}")
+        for intervention, count in retention_plan['intervention'].value_counts().items():
+            print(f"{intervention}: {count:,} customers")
     
-    report_path = 'output/reports/churn_analysis_report.md'
-    with open(report_path, 'w') as f:
-        f.write(report)
-    print(f"\nDetailed report saved to: {report_path}")
+    if 'report_path' in results:
+        print(f"\nDetailed report saved to: {results['report_path']}")
+
+def print_profile(trace_path):
+    """Summarize the profiled stages and point at the full trace"""
+    print("\nStage Profile:")
+    for span in profiler.summary('stage'):
+        line = f"{span['name']}: {span['wall_seconds']:.2f}s wall, {span['cpu_seconds']:.2f}s CPU"
+        if 'peak_memory_mb' in span:
+            line += f", {span['peak_memory_mb']:.1f} MB peak"
+        if 'rows' in span:
+            line += f", {span['rows']:,} rows"
+        print(line)
+    print(f"Trace written to: {trace_path} (open in ui.perfetto.dev or chrome://tracing)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Customer churn analysis pipeline')
+    parser.add_argument('--only', nargs='+', choices=[stage.name for stage in STAGES], metavar='STAGE',
+                        help='Run only these stages and the upstream stages they need '
+                             f"({', '.join(stage.name for stage in STAGES)})")
+    parser.add_argument('--workers', type=int, default=4, help='Stages that may run at the same time')
+    parser.add_argument('--profile', nargs='?', const='output/profile/trace.json', metavar='TRACE',
+                        help='Record time, CPU, memory and row counts per stage and write a Chrome trace '
+                             '(default: output/profile/trace.json)')
+    parser.add_argument('--train-cores', type=int, metavar='N',
+                        help='Train the models concurrently in worker processes sharing N cores '
+                             '(fewer than 3 trains them one at a time)')
+    args = parser.parse_args()
+
+    global train_cores
+    train_cores = args.train_cores
+    if args.profile:
+        profiler.enable()
+    executor = PipelineExecutor(STAGES, max_workers=args.workers)
+    results = executor.run(args.only)
+    print_results(results)
+    if args.profile:
+        print_profile(profiler.write_trace(args.profile))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,9 +1,24 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
 from xgboost import XGBClassifier
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, roc_auc_score
 import numpy as np
 import pandas as pd
+from tree_ensemble import FlatTreeEnsemble
+from profiler import profiler
+from pipeline import log, process_context
+from evaluation import (binary_confusion_matrix, bootstrap_confidence_intervals,
+                        classification_report_from_confusion, roc_auc_from_scores)
+
+def _fit_model(name, model, X_train, y_train):
+    """Fit a single model and measure where and when it ran and its wall and CPU time"""
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    model.fit(X_train, y_train)
+    return (name, model, wall_start, time.perf_counter() - wall_start, time.process_time() - cpu_start,
+            os.getpid())
 
 class ModelTrainer:
     def __init__(self):
@@ -14,25 +29,88 @@ class ModelTrainer:
         }
         self.trained_models = {}
         self.feature_importance = {}
+        self.training_times = {}
 
-    def train_models(self, X_train, y_train):
-        """Train all models"""
-        for name, model in self.models.items():
-            print(f"Training {name}...")
-            model.fit(X_train, y_train)
+    def train_models(self, X_train, y_train, parallel=False, n_jobs=None):
+        """Train all models, optionally fitting them concurrently in worker processes"""
+        total_cores = n_jobs or os.cpu_count() or 1
+        # Three concurrent fits need a core each, so smaller budgets train one model at a time
+        parallel = parallel and total_cores >= 3
+        if parallel:
+            core_budget = self._split_core_budget(total_cores)
+        elif n_jobs:
+            core_budget = {'random_forest': n_jobs, 'xgboost': n_jobs}
+        else:
+            core_budget = {}
+        for name, cores in core_budget.items():
+            self.models[name].set_params(n_jobs=cores)
+        
+        if parallel:
+            log(f"Training {', '.join(self.models)} in parallel on {total_cores} cores...")
+            with ProcessPoolExecutor(max_workers=len(self.models), mp_context=process_context) as executor:
+                futures = [executor.submit(_fit_model, name, model, X_train, y_train)
+                           for name, model in self.models.items()]
+                fitted = [future.result() for future in futures]
+            # Workers share the parent's perf_counter clock, so their fits line up in the trace
+            for name, _, wall_start, wall_time, cpu_time, pid in fitted:
+                profiler.add_event(f'train.{name}', 'model', wall_start, wall_time,
+                                   process_cpu_seconds=cpu_time, rows=X_train.shape[0], pid=pid, tid=pid)
+        else:
+            fitted = []
+            for name, model in self.models.items():
+                log(f"Training {name}...")
+                with profiler.span(f'train.{name}', 'model', rows=X_train.shape[0]):
+                    fitted.append(_fit_model(name, model, X_train, y_train))
+        
+        for name, model, _, wall_time, cpu_time, _ in fitted:
+            self.models[name] = model
             self.trained_models[name] = model
+            self.training_times[name] = {
+                'wall_time': wall_time,
+                'cpu_time': cpu_time,
+                'n_jobs': core_budget.get(name)
+            }
+            log(f"Trained {name} in {wall_time:.2f}s wall, {cpu_time:.2f}s CPU")
+        
+        return self.training_times
+
+    def get_hyperparameters(self):
+        """Model hyperparameters that affect the fitted result (thread counts excluded)"""
+        return {
+            name: {key: value for key, value in model.get_params().items() if key != 'n_jobs'}
+            for name, model in self.models.items()
+        }
+
+    @staticmethod
+    def _split_core_budget(total_cores):
+        """Share a core budget between concurrently trained models"""
+        # Logistic regression is single-threaded, so the tree ensembles split the rest
+        forest_cores = max(1, (total_cores - 1) // 2)
+        return {
+            'random_forest': forest_cores,
+            'xgboost': max(1, total_cores - 1 - forest_cores)
+        }
 
-    def evaluate_models(self, X_test, y_test):
-        """Evaluate all trained models"""
+    def evaluate_models(self, X_test, y_test, n_bootstrap=0, random_state=42):
+        """Evaluate all trained models from a single inference pass each"""
+        y_true = np.asarray(y_test).astype(int)
         results = {}
         for name, model in self.trained_models.items():
-            predictions = model.predict(X_test)
-            results[name] = {
-                'accuracy': accuracy_score(y_test, predictions),
-                'roc_auc': roc_auc_score(y_test, model.predict_proba(X_test)[:, 1]),
-                'confusion_matrix': confusion_matrix(y_test, predictions),
-                'classification_report': classification_report(y_test, predictions)
-            }
+            with profiler.span(f'evaluate.{name}', 'model', rows=len(y_true)):
+                # Hard labels follow from the positive-class probability, as in predict()
+                probabilities = model.predict_proba(X_test)[:, 1]
+                predictions = (probabilities > 0.5).astype(int)
+                confusion = binary_confusion_matrix(y_true, predictions)
+                results[name] = {
+                    'accuracy': np.trace(confusion) / confusion.sum(),
+                    'roc_auc': roc_auc_from_scores(y_true, probabilities),
+                    'confusion_matrix': confusion,
+                    'classification_report': classification_report_from_confusion(confusion)
+                }
+                if n_bootstrap:
+                    results[name].update(bootstrap_confidence_intervals(
+                        y_true, probabilities, n_bootstrap=n_bootstrap, random_state=random_state
+                    ))
         return results
 
     def get_feature_importance(self, feature_names):
@@ -50,6 +128,13 @@ class ModelTrainer:
         
         return self.feature_importance
 
+    def export_tree_ensembles(self):
+        """Flatten the trained tree ensembles into numpy-only evaluators"""
+        return {
+            name: FlatTreeEnsemble.from_model(self.trained_models[name])
+            for name in ('random_forest', 'xgboost') if name in self.trained_models
+        }
+
     def predict(self, X, model_name='xgboost'):
         """Make predictions using a specific model"""
         if model_name not in self.trained_models:
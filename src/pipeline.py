@@ -0,0 +1,96 @@
+import multiprocessing
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from profiler import profiler
+
+# One pipeline step: func(**inputs) returns a dict holding exactly the declared outputs
+Stage = namedtuple('Stage', ['name', 'func', 'inputs', 'outputs'])
+
+_log_lock = threading.Lock()
+
+# Stages run on threads, and forking a process while other threads run (e.g. XGBoost training) can
+# deadlock the child, so process pools started from stages launch workers from a clean server process
+process_context = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+
+
+def log(message):
+    """Print a whole line at once so messages from concurrent stages never interleave"""
+    with _log_lock:
+        sys.stdout.write(f'{message}\n')
+        sys.stdout.flush()
+
+
+class PipelineExecutor:
+    """Runs declared stages as a dependency graph, with independent stages in parallel threads"""
+
+    def __init__(self, stages, max_workers=4):
+        self.stages = {stage.name: stage for stage in stages}
+        self.max_workers = max_workers
+        self.producers = {}
+        for stage in stages:
+            for output in stage.outputs:
+                if output in self.producers:
+                    raise ValueError(f"Output '{output}' is produced by both "
+                                     f"'{self.producers[output]}' and '{stage.name}'")
+                self.producers[output] = stage.name
+        self.stage_times = {}
+
+    def required_stages(self, targets=None):
+        """Target stages plus every upstream stage they need, in declaration order"""
+        if targets is None:
+            return list(self.stages)
+        unknown = [name for name in targets if name not in self.stages]
+        if unknown:
+            raise KeyError(f"Unknown stages: {unknown} (available: {list(self.stages)})")
+
+        required = set()
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name in required:
+                continue
+            required.add(name)
+            for value in self.stages[name].inputs:
+                if value not in self.producers:
+                    raise ValueError(f"Stage '{name}' needs '{value}', which no stage produces")
+                pending.append(self.producers[value])
+        return [name for name in self.stages if name in required]
+
+    def run(self, targets=None):
+        """Execute the required stages as soon as their inputs exist and return all produced values"""
+        remaining = self.required_stages(targets)
+        values = {}
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while remaining or running:
+                for name in [name for name in remaining
+                             if all(value in values for value in self.stages[name].inputs)]:
+                    remaining.remove(name)
+                    running[executor.submit(self._run_stage, self.stages[name], values)] = name
+                if not running:
+                    raise RuntimeError(f"Stages {remaining} can never run; their inputs form a cycle")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        values.update(future.result())
+                    except Exception:
+                        for pending in running:
+                            pending.cancel()
+                        raise
+        return values
+
+    def _run_stage(self, stage, values):
+        start = time.perf_counter()
+        with profiler.span(stage.name, 'stage'):
+            outputs = stage.func(**{name: values[name] for name in stage.inputs}) or {}
+        missing = set(stage.outputs) - set(outputs)
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' did not produce {sorted(missing)}")
+        self.stage_times[stage.name] = time.perf_counter() - start
+        return {name: outputs[name] for name in stage.outputs}
@@ -0,0 +1,158 @@
+import time
+from functools import wraps
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from matplotlib.patches import Patch
+from segment_engine import encode_dimension
+
+def timed_plot(method):
+    """Record how long a plot method takes to build its figure(s) in self.render_times"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        result = method(self, *args, **kwargs)
+        self.render_times[method.__name__] = time.perf_counter() - start
+        return result
+    return wrapper
+
+def grouped_means(values, codes, n_groups):
+    """Per-group means and counts from two bincounts"""
+    valid = codes >= 0
+    counts = np.bincount(codes[valid], minlength=n_groups)
+    sums = np.bincount(codes[valid], weights=np.asarray(values, dtype=np.float64)[valid], minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / counts, counts
+
+def grouped_box_stats(values, codes, n_groups, whis=1.5):
+    """matplotlib bxp statistics for every group from a single sort
+
+    Quartiles use numpy's linear interpolation and whiskers the usual
+    1.5 IQR rule, like plt.boxplot. Fliers are only counted, so the result
+    stays a few numbers per group however many rows there are.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = (codes >= 0) & ~np.isnan(values)
+    values, codes = values[valid], codes[valid]
+    order = np.lexsort((values, codes))
+    values, codes = values[order], codes[order]
+
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    present = counts > 0
+
+    def quantile(q):
+        position = q * (counts - 1)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, counts - 1)
+        fraction = position - lower
+        low_value = values[np.minimum(starts + lower, len(values) - 1)]
+        high_value = values[np.minimum(starts + upper, len(values) - 1)]
+        return low_value + fraction * (high_value - low_value)
+
+    q1, median, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+    iqr = q3 - q1
+    low_bound = (q1 - whis * iqr)[codes]
+    high_bound = (q3 + whis * iqr)[codes]
+    inside = (values >= low_bound) & (values <= high_bound)
+
+    # Whiskers are the most extreme values inside the bounds, found with segmented reductions
+    nonempty_starts = starts[present]
+    whislo = np.full(n_groups, np.nan)
+    whishi = np.full(n_groups, np.nan)
+    whislo[present] = np.minimum.reduceat(np.where(inside, values, np.inf), nonempty_starts)
+    whishi[present] = np.maximum.reduceat(np.where(inside, values, -np.inf), nonempty_starts)
+    outliers = np.bincount(codes[~inside], minlength=n_groups)
+    means = np.bincount(codes, weights=values, minlength=n_groups)
+
+    stats = []
+    for i in range(n_groups):
+        if not present[i]:
+            stats.append(None)
+            continue
+        stats.append({
+            'med': median[i], 'q1': q1[i], 'q3': q3[i],
+            'whislo': whislo[i], 'whishi': whishi[i],
+            'mean': means[i] / counts[i], 'fliers': [],
+            'n': int(counts[i]), 'n_outliers': int(outliers[i])
+        })
+    return stats
+
+def draw_box_summary(ax, x, y, hue=None, width=0.8):
+    """Box plot drawn with ax.bxp from per-group summaries instead of raw rows"""
+    x_codes, x_labels = encode_dimension(x)
+    if hue is None:
+        hue_codes, hue_labels = np.zeros(len(x_codes), dtype=np.int64), [None]
+    else:
+        hue_codes, hue_labels = encode_dimension(hue)
+    n_hue = len(hue_labels)
+    codes = np.where((x_codes >= 0) & (hue_codes >= 0), x_codes * n_hue + hue_codes, -1)
+    stats = grouped_box_stats(y, codes, len(x_labels) * n_hue)
+
+    palette = sns.color_palette(n_colors=max(n_hue, 1))
+    box_width = width / n_hue
+    for h in range(n_hue):
+        group_stats = [(i, stats[i * n_hue + h]) for i in range(len(x_labels)) if stats[i * n_hue + h]]
+        if not group_stats:
+            continue
+        positions = [i - width / 2 + box_width * (h + 0.5) for i, _ in group_stats]
+        ax.bxp([s for _, s in group_stats], positions=positions, widths=box_width * 0.9,
+               showfliers=False, patch_artist=True, manage_ticks=False,
+               boxprops={'facecolor': palette[h]}, medianprops={'color': '0.2'})
+
+    ax.set_xticks(range(len(x_labels)))
+    ax.set_xticklabels([str(label) for label in x_labels])
+    ax.set_xlim(-0.5, len(x_labels) - 0.5)
+    ax.set_xlabel(x.name)
+    ax.set_ylabel(y.name)
+    if hue is not None:
+        ax.legend([Patch(facecolor=palette[h]) for h in range(n_hue)],
+                  [str(label) for label in hue_labels], title=hue.name)
+
+def draw_rate_bars(ax, x, target):
+    """Bar chart of the mean of a 0/1 target per category, from a bincount"""
+    codes, labels = encode_dimension(x)
+    rates, _ = grouped_means(target, codes, len(labels))
+    ax.bar(range(len(labels)), rates, color=sns.color_palette()[0])
+    ax.set_xticks(range(len(labels)))
+    ax.set_xticklabels([str(label) for label in labels])
+    ax.set_xlabel(x.name)
+    ax.set_ylabel(f'{target.name} rate')
+
+def draw_stacked_hist(ax, x, hue, bins='auto'):
+    """Stacked histogram from per-hue bin counts computed on shared edges"""
+    values = np.asarray(x, dtype=np.float64)
+    values_present = values[~np.isnan(values)]
+    edges = np.histogram_bin_edges(values_present, bins=bins)
+    if pd.api.types.is_integer_dtype(x.dtype):
+        # Whole-number widths centred on integers, so discrete data leaves no empty bins
+        width = max(1, int(np.ceil(edges[1] - edges[0])))
+        edges = np.arange(values_present.min() - 0.5, values_present.max() + width, width)
+    hue_codes, hue_labels = encode_dimension(hue)
+    palette = sns.color_palette(n_colors=len(hue_labels))
+
+    bottom = np.zeros(len(edges) - 1)
+    for h, label in enumerate(hue_labels):
+        counts, _ = np.histogram(values[hue_codes == h], bins=edges)
+        ax.bar(edges[:-1], counts, width=np.diff(edges), bottom=bottom, align='edge',
+               color=palette[h], alpha=0.75, label=str(label))
+        bottom += counts
+    ax.set_xlabel(x.name)
+    ax.set_ylabel('Count')
+    ax.legend(title=hue.name)
+
+def draw_binned_rate(ax, x, y, target, bins=50):
+    """Rasterize a dense scatter into a 2D grid coloured by the target rate per cell"""
+    x_values = np.asarray(x, dtype=np.float64)
+    y_values = np.asarray(y, dtype=np.float64)
+    counts, x_edges, y_edges = np.histogram2d(x_values, y_values, bins=bins)
+    hits, _, _ = np.histogram2d(x_values, y_values, bins=[x_edges, y_edges],
+                                weights=np.asarray(target, dtype=np.float64))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rate = np.where(counts > 0, hits / counts, np.nan)
+    mesh = ax.pcolormesh(x_edges, y_edges, np.ma.masked_invalid(rate.T), cmap='coolwarm',
+                         vmin=0, vmax=1, rasterized=True)
+    ax.figure.colorbar(mesh, ax=ax, label=f'{target.name} rate')
+    ax.set_xlabel(x.name)
+    ax.set_ylabel(y.name)
+    return counts
@@ -0,0 +1,160 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+
+class _NullSpan:
+    """Stand-in returned while profiling is off, so instrumented code costs one attribute check"""
+
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, profiler, name, category, rows):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+        self.rows = rows
+        self.peak_bytes = 0
+
+    def __enter__(self):
+        self.profiler._open(self)
+        self.start = time.perf_counter()
+        self.thread_cpu_start = time.thread_time()
+        self.process_cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, *exc_info):
+        wall = time.perf_counter() - self.start
+        thread_cpu = time.thread_time() - self.thread_cpu_start
+        process_cpu = time.process_time() - self.process_cpu_start
+        self.profiler._close(self)
+        self.profiler.add_event(self.name, self.category, self.start, wall, cpu_seconds=thread_cpu,
+                                process_cpu_seconds=process_cpu, rows=self.rows,
+                                peak_memory_bytes=self.peak_bytes if self.profiler.trace_memory else None)
+        return False
+
+
+class Profiler:
+    """Wall time, CPU time, peak traced memory and row counts per span, exported as a Chrome trace
+
+    Spans nest and may overlap across threads. CPU time is the span's own
+    thread; process CPU time is recorded as well for stages whose work runs
+    in native thread pools. With memory tracing on, a span's peak is the
+    highest tracemalloc reading while it was open, which includes
+    allocations by stages running at the same time.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_memory = False
+        self.events = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._open_spans = []
+        self._thread_names = {}
+
+    def enable(self, trace_memory=True):
+        self.enabled = True
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self):
+        self.enabled = False
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def span(self, name, category='stage', rows=None):
+        """Context manager timing one unit of work; a no-op while profiling is disabled"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category, rows)
+
+    def set_rows(self, rows):
+        """Attach a row count to the innermost open span of the calling thread"""
+        if not self.enabled:
+            return
+        stack = getattr(self._local, 'stack', None)
+        if stack:
+            stack[-1].rows = rows
+
+    def _fold_peak(self):
+        # Every open span sees the peak reached since the last fold, then the peak restarts from now
+        peak = tracemalloc.get_traced_memory()[1]
+        for span in self._open_spans:
+            span.peak_bytes = max(span.peak_bytes, peak)
+        tracemalloc.reset_peak()
+
+    def _open(self, span):
+        with self._lock:
+            if self.trace_memory:
+                self._fold_peak()
+                span.peak_bytes = tracemalloc.get_traced_memory()[0]
+            self._open_spans.append(span)
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        self._local.stack.append(span)
+
+    def _close(self, span):
+        self._local.stack.remove(span)
+        with self._lock:
+            if self.trace_memory:
+                self._fold_peak()
+            self._open_spans.remove(span)
+
+    def add_event(self, name, category, start, wall_seconds, cpu_seconds=None, process_cpu_seconds=None,
+                  rows=None, peak_memory_bytes=None, pid=None, tid=None):
+        """Record a finished span; `start` is a time.perf_counter() reading, valid across local processes"""
+        if not self.enabled:
+            return
+        args = {'cpu_seconds': cpu_seconds, 'process_cpu_seconds': process_cpu_seconds, 'rows': rows,
+                'peak_memory_mb': peak_memory_bytes / 2 ** 20 if peak_memory_bytes is not None else None}
+        event = {
+            'name': name, 'cat': category, 'ph': 'X',
+            'ts': start * 1e6, 'dur': wall_seconds * 1e6,
+            'pid': pid or os.getpid(), 'tid': tid or threading.get_ident(),
+            'args': {key: value for key, value in args.items() if value is not None}
+        }
+        with self._lock:
+            self.events.append(event)
+            if tid is None:
+                # Pool threads are gone by the time the trace is written, so name them now
+                self._thread_names[event['tid']] = threading.current_thread().name
+
+    def summary(self, category=None):
+        """Recorded spans in start order as plain dicts with seconds and megabytes"""
+        events = sorted(self.events, key=lambda event: event['ts'])
+        return [dict(name=event['name'], category=event['cat'], wall_seconds=event['dur'] / 1e6, **event['args'])
+                for event in events if category is None or event['cat'] == category]
+
+    def write_trace(self, path):
+        """Write the spans in Chrome trace-event format (chrome://tracing, ui.perfetto.dev)"""
+        with self._lock:
+            events = list(self.events)
+            thread_names = dict(self._thread_names)
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': name}}
+                    for tid, name in thread_names.items()]
+        metadata += [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': f'worker {pid}'}}
+                     for pid in {event['pid'] for event in events} if pid != os.getpid()]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, f)
+        return path
+
+
+# Shared by every module, like the logging root logger; main enables it with --profile
+profiler = Profiler()
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+import threading
+import matplotlib
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from artifact_store import ArtifactStore
+from column_cache import file_digest
+
+
+def value_digest(value):
+    """Content hash of plot inputs: frames and series by their values, containers recursively"""
+    digest = hashlib.sha256()
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        frame = value.to_frame() if isinstance(value, pd.Series) else value
+        digest.update(repr([(str(name), str(dtype)) for name, dtype in frame.dtypes.items()]).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(frame, index=True).values.tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(repr((value.dtype.str, value.shape)).encode('utf-8'))
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        for key in sorted(value, key=repr):
+            digest.update(repr(key).encode('utf-8'))
+            digest.update(value_digest(value[key]).encode('utf-8'))
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            digest.update(value_digest(item).encode('utf-8'))
+    else:
+        digest.update(repr(value).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def style_digest(source_files):
+    """Hash of everything about the look of a plot that is not its data"""
+    return ArtifactStore.make_key(
+        matplotlib.__version__,
+        sns.__version__,
+        # The backend only decides where figures are drawn, not how they look
+        sorted((key, repr(value)) for key, value in matplotlib.rcParams.items()
+               if not key.startswith('backend')),
+        [file_digest(path) for path in source_files]
+    )
+
+
+# Renderers running in concurrent pipeline stages share one manifest file
+_manifest_lock = threading.Lock()
+
+
+class RenderCache:
+    """Manifest of rendered figures keyed by a hash of their inputs and styling"""
+
+    def __init__(self, output_dir, manifest_name='render_manifest.json'):
+        self.manifest_path = os.path.join(output_dir, manifest_name)
+        self.entries = self._read()
+        self.updated = {}
+
+    def _read(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def is_current(self, name, key, paths):
+        """True when the figure was last rendered from the same key and its files still exist"""
+        entry = self.entries.get(name)
+        return (entry is not None and entry['key'] == key and entry['paths'] == list(paths)
+                and all(os.path.exists(path) for path in paths))
+
+    def record(self, name, key, paths):
+        self.entries[name] = self.updated[name] = {'key': key, 'paths': list(paths)}
+
+    def save(self):
+        """Merge this run's entries into the manifest on disk and write it atomically"""
+        with _manifest_lock:
+            entries = self._read()
+            entries.update(self.updated)
+            tmp_path = f'{self.manifest_path}.tmp-{os.getpid()}'
+            with open(tmp_path, 'w') as f:
+                json.dump(entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.manifest_path)
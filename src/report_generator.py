@@ -1,60 +1,128 @@
+import csv
+import io
+import json
+
+class ReportWriter:
+    """Streams Markdown to a file handle while emitting JSON/CSV records of the same results
+
+    Sections are written as they are produced, so the report is never held
+    in memory. Each figure that appears in the Markdown is also recorded
+    once as (section, group, name, value) in the optional companions: a
+    JSON array streamed element by element and a CSV table.
+    """
+
+    FIELDS = ['section', 'group', 'name', 'value']
+
+    def __init__(self, markdown, json_file=None, csv_file=None):
+        self.markdown = markdown
+        self.json_file = json_file
+        self.csv_writer = csv.writer(csv_file) if csv_file is not None else None
+        self.records = 0
+        if self.json_file is not None:
+            self.json_file.write('[')
+        if self.csv_writer is not None:
+            self.csv_writer.writerow(self.FIELDS)
+
+    def write(self, text):
+        self.markdown.write(text)
+
+    def record(self, section, group, name, value):
+        """Add one machine-readable result row to the companions"""
+        value = value.item() if hasattr(value, 'item') else value
+        if self.json_file is not None:
+            row = dict(zip(self.FIELDS, [section, str(group), str(name), value]))
+            self.json_file.write((',\n' if self.records else '\n') + json.dumps(row))
+        if self.csv_writer is not None:
+            self.csv_writer.writerow([section, group, name, value])
+        self.records += 1
+
+    def close(self):
+        """Terminate the JSON array; the file handles themselves belong to the caller"""
+        if self.json_file is not None:
+            self.json_file.write('\n]\n')
+
 class ReportGenerator:
     @staticmethod
     def generate_report(evaluation_results, business_metrics, high_risk_segments, recommendations):
-        report = """
+        """Build the Markdown report as a string"""
+        buffer = io.StringIO()
+        ReportGenerator.write_report(buffer, evaluation_results, business_metrics,
+                                     high_risk_segments, recommendations)
+        return buffer.getvalue()
+
+    @staticmethod
+    def write_report(markdown, evaluation_results, business_metrics, high_risk_segments, recommendations,
+                     json_file=None, csv_file=None):
+        """Stream the Markdown report (and optional JSON/CSV companions) in one pass over the results"""
+        writer = ReportWriter(markdown, json_file, csv_file)
+        writer.write("""
 # Customer Churn Analysis Report
 
 ## 1. Model Performance Analysis
 
 ### Model Evaluation Results:
-"""
+""")
         for model_name, results in evaluation_results.items():
-            report += f"""
+            writer.write(f"""
 #### {model_name.capitalize()} Model:
 - Accuracy: {results['accuracy']:.4f}
 - ROC AUC: {results['roc_auc']:.4f}
-
+""")
+            writer.record('model_performance', model_name, 'accuracy', results['accuracy'])
+            writer.record('model_performance', model_name, 'roc_auc', results['roc_auc'])
+            if 'accuracy_ci' in results:
+                writer.write(f"""- Accuracy 95% CI: {results['accuracy_ci'][0]:.4f} - {results['accuracy_ci'][1]:.4f}
+- ROC AUC 95% CI: {results['roc_auc_ci'][0]:.4f} - {results['roc_auc_ci'][1]:.4f}
+""")
+                for metric in ('accuracy_ci', 'roc_auc_ci'):
+                    writer.record('model_performance', model_name, f'{metric}_low', results[metric][0])
+                    writer.record('model_performance', model_name, f'{metric}_high', results[metric][1])
+            writer.write(f"""
 Classification Report:
 ```
 {results['classification_report']}
 ```
-"""
+""")
 
-        report += """
+        writer.write("""
 ## 2. Business Metrics Analysis
 
 ### Key Performance Indicators:
-"""
+""")
         for metric, value in business_metrics.items():
             if 'rate' in metric:
-                report += f"- {metric.replace('_', ' ').title()}: {value:.2%}\n"
+                writer.write(f"- {metric.replace('_', ' ').title()}: {value:.2%}\n")
             else:
-                report += f"- {metric.replace('_', ' ').title()}: ${value:,.2f}\n"
+                writer.write(f"- {metric.replace('_', ' ').title()}: ${value:,.2f}\n")
+            writer.record('business_metrics', '', metric, value)
 
-        report += """
+        writer.write("""
 ## 3. High Risk Segment Analysis
 
 ### Churn Probability by Segment:
-"""
+""")
         for segment_type, probabilities in high_risk_segments.items():
-            report += f"\n#### {segment_type.replace('_', ' ').title()}:\n"
+            writer.write(f"\n#### {segment_type.replace('_', ' ').title()}:\n")
             for category, prob in probabilities.items():
-                report += f"- {category}: {prob:.2%} churn probability\n"
+                writer.write(f"- {category}: {prob:.2%} churn probability\n")
+                writer.record('high_risk_segments', segment_type, category, prob)
 
-        report += """
+        writer.write("""
 ## 4. Business Recommendations
 
 ### Action Items:
-"""
+""")
         for rec in recommendations:
-            report += f"""
+            writer.write(f"""
 #### {rec['area']}:
 - Finding: {rec['finding']}
 - Recommendation: {rec['recommendation']}
 - Potential Impact: {rec['potential_impact']}
-"""
+""")
+            for field in ('finding', 'recommendation', 'potential_impact'):
+                writer.record('recommendations', rec['area'], field, rec[field])
 
-        report += """
+        writer.write("""
 ## 5. Visualization References
 
 The following visualizations are available in the output/visualizations folder:
@@ -80,5 +148,5 @@ The following visualizations are available in the output/visualizations folder:
    - Monthly performance tracking
    - Quarterly strategy adjustment
    - Annual comprehensive analysis
-"""
-        return report
\ No newline at end of file
+""")
+        writer.close()
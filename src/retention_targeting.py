@@ -0,0 +1,128 @@
+import numpy as np
+
+# Cost per contacted customer and the share of their churn risk the intervention removes
+DEFAULT_INTERVENTIONS = {
+    'email_offer': {'cost': 5, 'effect': 0.05},
+    'discount': {'cost': 50, 'effect': 0.25},
+    'retention_call': {'cost': 120, 'effect': 0.40}
+}
+
+class RetentionTargeting:
+    """Pick who to contact, and with which intervention, to maximize expected value under a budget
+
+    A customer's expected value for an intervention is the revenue it keeps
+    (churn probability x monthly charges x horizon x effect) minus its cost.
+    Moving a customer from one intervention to a costlier one returns
+    revenue x (extra effect / extra cost) - 1 per unit of extra cost, so the
+    order of worthwhile upgrades (nothing -> cheaper -> costlier) is the
+    upper hull of the cost/effect table and is the same for every customer.
+    Upgrades from all customers are taken greedily by that return, skipping
+    any that no longer fit, the classic greedy for a multiple-choice
+    knapsack. It is not always optimal; leftover budget smaller than the
+    next upgrade can go unspent.
+    """
+
+    def __init__(self, interventions=None, horizon_months=12):
+        self.interventions = interventions or DEFAULT_INTERVENTIONS
+        self.horizon_months = horizon_months
+        self.names = np.array(list(self.interventions))
+        self.costs = np.array([item['cost'] for item in self.interventions.values()], dtype=np.float64)
+        self.effects = np.array([item['effect'] for item in self.interventions.values()], dtype=np.float64)
+        self.chain, self.slopes, self.extra_costs = self._upgrade_chain()
+
+    def _upgrade_chain(self):
+        """Interventions on the upper cost/effect hull, with each upgrade's effect per cost and extra cost"""
+        chain, slopes, extra_costs = [], [], []
+        current_cost, current_effect = 0.0, 0.0
+        while True:
+            costlier = np.flatnonzero(self.costs > current_cost)
+            if len(costlier) == 0:
+                break
+            upgrade_slopes = (self.effects[costlier] - current_effect) / (self.costs[costlier] - current_cost)
+            best = costlier[np.argmax(upgrade_slopes)]
+            if upgrade_slopes.max() <= 0:
+                break
+            chain.append(best)
+            slopes.append(upgrade_slopes.max())
+            extra_costs.append(self.costs[best] - current_cost)
+            current_cost, current_effect = self.costs[best], self.effects[best]
+        return np.array(chain, dtype=np.int64), np.array(slopes), np.array(extra_costs)
+
+    def retained_revenue(self, churn_probability, monthly_charges):
+        """Revenue at risk per customer over the horizon"""
+        return (np.asarray(churn_probability, dtype=np.float64)
+                * np.asarray(monthly_charges, dtype=np.float64) * self.horizon_months)
+
+    def select(self, churn_probability, monthly_charges, budget):
+        """Customers to contact, highest expected value first, with intervention, cost and expected value"""
+        retained_revenue = self.retained_revenue(churn_probability, monthly_charges)
+        n = len(retained_revenue)
+
+        # Return per unit of extra cost for every upgrade of every customer, flattened step-major
+        efficiency = np.concatenate([retained_revenue * slope - 1 for slope in self.slopes] or [np.zeros(0)])
+        taken = self._take_upgrades(efficiency, np.flatnonzero(efficiency > 0), n, float(budget))
+
+        # Upgrades are taken in chain order, so the number taken gives each customer's intervention
+        n_steps = np.bincount(taken % n, minlength=n)
+        selected = np.flatnonzero(n_steps)
+        choice = self.chain[n_steps[selected] - 1]
+
+        cost = self.costs[choice]
+        value = retained_revenue[selected] * self.effects[choice] - cost
+        order = np.argsort(-value, kind='stable')
+        selected, choice, cost, value = selected[order], choice[order], cost[order], value[order]
+        return {
+            'customers': selected,
+            'interventions': self.names[choice],
+            'cost': cost,
+            'expected_value': value,
+            'total_cost': float(cost.sum()),
+            'total_expected_value': float(value.sum())
+        }
+
+    def _take_upgrades(self, efficiency, candidates, n, remaining):
+        """Walk upgrades from the best return down, taking every one that still fits the budget
+
+        An upgrade that does not fit is skipped, not a stopping point, and so
+        is every later step of the same customer. Upgrades are handled in
+        blocks holding as many as the remaining budget could buy at the
+        cheapest step, so only those are sorted.
+        """
+        dead = np.zeros(len(efficiency), dtype=bool)
+        taken = []
+        min_cost = self.extra_costs.min() if len(self.extra_costs) else np.inf
+        while len(candidates) and remaining >= min_cost:
+            # Upgrades that no longer fit never will, since the remaining budget only shrinks
+            if self.extra_costs.max() > remaining:
+                fits = self.extra_costs[candidates // n] <= remaining
+                dead[candidates[~fits]] = True
+                candidates = candidates[fits]
+            limit = min(len(candidates), int(remaining // min_cost))
+            if limit < len(candidates):
+                top = np.argpartition(-efficiency[candidates], limit - 1)
+                block, candidates = candidates[top[:limit]], candidates[top[limit:]]
+            else:
+                block, candidates = candidates, candidates[:0]
+            # A customer's earlier step never has a lower return, and ties keep the earlier step first
+            block = block[np.lexsort((block // n, -efficiency[block]))]
+            remaining = self._walk_block(block, n, remaining, dead, taken)
+        return np.concatenate(taken) if taken else np.zeros(0, dtype=np.int64)
+
+    def _walk_block(self, block, n, remaining, dead, taken):
+        """Take the longest affordable run, drop what can no longer be taken, repeat"""
+        while len(block):
+            steps = block // n
+            for step in range(len(self.chain)):
+                in_step = steps == step
+                blocked = in_step & (self.extra_costs[steps] > remaining)
+                if step:
+                    blocked |= in_step & dead[np.maximum(block - n, 0)]
+                dead[block[blocked]] = True
+            block = block[~dead[block]]
+            costs = self.extra_costs[block // n]
+            # The first upgrade past the run costs more than is left, so the next pass drops it
+            run = int(np.searchsorted(np.cumsum(costs), remaining, side='right'))
+            taken.append(block[:run])
+            remaining -= costs[:run].sum()
+            block = block[run:]
+        return remaining
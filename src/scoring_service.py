@@ -0,0 +1,253 @@
+import argparse
+import asyncio
+import json
+import pickle
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+class LatencyStats:
+    """Rolling request latency percentiles plus throughput counters"""
+
+    def __init__(self, window=10000, rate_window_seconds=10.0):
+        self.latencies = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+        # Completed requests per whole second, so throughput reflects recent load rather than uptime
+        self.rate_window = rate_window_seconds
+        self.completions = deque()
+
+    def record_request(self, seconds, ok=True):
+        self.latencies.append(seconds)
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+        second = int(time.perf_counter())
+        if self.completions and self.completions[-1][0] == second:
+            self.completions[-1][1] += 1
+        else:
+            self.completions.append([second, 1])
+        self._expire(second)
+
+    def record_batch(self, size):
+        self.batch_sizes.append(size)
+
+    def _expire(self, now):
+        while self.completions and self.completions[0][0] <= now - self.rate_window:
+            self.completions.popleft()
+
+    def throughput(self):
+        """Requests per second over the last rate_window seconds (or the uptime, if shorter)"""
+        now = time.perf_counter()
+        self._expire(now)
+        span = min(self.rate_window, now - self.started)
+        return sum(count for _, count in self.completions) / span if span > 0 else 0.0
+
+    def snapshot(self):
+        """Current counters; latency percentiles are in milliseconds"""
+        elapsed = time.perf_counter() - self.started
+        latencies = np.fromiter(self.latencies, dtype=np.float64) * 1000
+        p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (0.0, 0.0)
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'uptime_seconds': elapsed,
+            'throughput_rps': self.throughput(),
+            'latency_p50_ms': float(p50),
+            'latency_p99_ms': float(p99),
+            'batches': len(self.batch_sizes),
+            'mean_batch_size': float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0
+        }
+
+class MicroBatcher:
+    """Collects concurrent scoring requests into batches bounded by size and wait time"""
+
+    def __init__(self, score_batch, max_batch_size=64, max_wait_ms=2.0, stats=None):
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.stats = stats or LatencyStats()
+        self.queue = asyncio.Queue()
+        # A single worker keeps model calls off the event loop and serialized
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    async def submit(self, record):
+        """Queue one record and wait for its churn probability"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((record, future))
+        return await future
+
+    async def run(self):
+        """Drain the queue forever, scoring one micro-batch at a time"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            records = [record for record, _ in batch]
+            futures = [future for _, future in batch]
+            self.stats.record_batch(len(batch))
+            try:
+                probabilities = await loop.run_in_executor(self.executor, self.score_batch, records)
+            except (KeyError, TypeError, ValueError):
+                # Isolate the bad records so the rest of the batch still gets scored
+                for record, future in batch:
+                    if future.cancelled():
+                        continue
+                    try:
+                        result = await loop.run_in_executor(self.executor, self.score_batch, [record])
+                        future.set_result(float(result[0]))
+                    except (KeyError, TypeError, ValueError) as error:
+                        future.set_exception(ValueError(f'Invalid record: {error}'))
+                    except Exception as error:
+                        future.set_exception(error)
+                continue
+            except Exception as error:
+                # Any other failure belongs to the whole batch; the loop must outlive it
+                for future in futures:
+                    if not future.cancelled():
+                        future.set_exception(error)
+                continue
+            for future, probability in zip(futures, probabilities):
+                if not future.cancelled():
+                    future.set_result(float(probability))
+
+class ScoringService:
+    def __init__(self, compiled_processor, model, max_batch_size=64, max_wait_ms=2.0):
+        self.compiled_processor = compiled_processor
+        self.model = model
+        self.buffer = compiled_processor.allocate(max_batch_size)
+        self.stats = LatencyStats()
+        self.batcher = MicroBatcher(self.score_batch, max_batch_size, max_wait_ms, self.stats)
+
+    @classmethod
+    def from_artifacts(cls, preprocessor_path, models_path, model_name='xgboost', **kwargs):
+        """Build the service from a pickled FeatureProcessor and trained model dict"""
+        with open(preprocessor_path, 'rb') as f:
+            feature_processor = pickle.load(f)
+        with open(models_path, 'rb') as f:
+            trained_models = pickle.load(f)
+        return cls(feature_processor.compile(), trained_models[model_name], **kwargs)
+
+    def score_batch(self, records):
+        """Transform records into the reusable buffer and return churn probabilities"""
+        X_batch = self.compiled_processor.transform_records(records, self.buffer)
+        return self.model.predict_proba(self.compiled_processor.model_input(X_batch))[:, 1]
+
+    async def handle_score(self, body):
+        payload = json.loads(body)
+        if isinstance(payload, list):
+            probabilities = await asyncio.gather(*(self.batcher.submit(record) for record in payload))
+            return {'churn_probabilities': list(probabilities)}
+        return {'churn_probability': await self.batcher.submit(payload)}
+
+    async def route(self, method, path, body):
+        """Dispatch a request and return (status line, JSON payload)"""
+        if method == 'POST' and path == '/score':
+            start = time.perf_counter()
+            try:
+                response = await self.handle_score(body)
+            except ValueError as error:
+                self.stats.record_request(time.perf_counter() - start, ok=False)
+                return '400 Bad Request', {'error': str(error)}
+            except Exception as error:
+                self.stats.record_request(time.perf_counter() - start, ok=False)
+                return '500 Internal Server Error', {'error': f'Scoring failed: {error}'}
+            self.stats.record_request(time.perf_counter() - start)
+            return '200 OK', response
+        if method == 'GET' and path == '/metrics':
+            return '200 OK', self.stats.snapshot()
+        if method == 'GET' and path == '/health':
+            return '200 OK', {'status': 'ok'}
+        return '404 Not Found', {'error': f'No route for {method} {path}'}
+
+    async def handle_connection(self, reader, writer):
+        """Minimal HTTP/1.1 loop with keep-alive support"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode('latin-1').split(' ', 2)
+                if len(parts) != 3:
+                    # Nothing after a malformed request line can be framed reliably, so reply and close
+                    await self._respond(writer, '400 Bad Request', {'error': 'Malformed request line'}, close=True)
+                    break
+                method, path, _ = parts
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    content_length = int(headers.get('content-length', 0))
+                except ValueError:
+                    content_length = -1
+                if content_length < 0:
+                    await self._respond(writer, '400 Bad Request', {'error': 'Invalid Content-Length'}, close=True)
+                    break
+                body = await reader.readexactly(content_length)
+
+                status, payload = await self.route(method, path, body)
+                close = headers.get('connection', '').lower() == 'close'
+                await self._respond(writer, status, payload, close)
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, close=False):
+        data = json.dumps(payload).encode('utf-8')
+        connection = 'Connection: close\r\n' if close else ''
+        writer.write(f'HTTP/1.1 {status}\r\nContent-Type: application/json\r\n{connection}'
+                     f'Content-Length: {len(data)}\r\n\r\n'.encode('latin-1') + data)
+        await writer.drain()
+
+    async def serve(self, host='127.0.0.1', port=8080):
+        batch_task = asyncio.create_task(self.batcher.run())
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Scoring service listening on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batch_task.cancel()
+
+def main():
+    parser = argparse.ArgumentParser(description='Online churn scoring service with micro-batching')
+    parser.add_argument('--preprocessor', required=True, help='Pickled FeatureProcessor artifact')
+    parser.add_argument('--models', required=True, help='Pickled dict of trained models')
+    parser.add_argument('--model-name', default='xgboost', help='Model to score with')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    args = parser.parse_args()
+
+    service = ScoringService.from_artifacts(
+        args.preprocessor, args.models, args.model_name,
+        max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms
+    )
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+def encode_dimension(keys):
+    """Integer codes and ordered labels for a grouping column (categorical order is kept, -1 is missing)"""
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        return np.asarray(keys.cat.codes, dtype=np.int64), keys.cat.categories
+    codes, labels = pd.factorize(keys, sort=True)
+    return codes.astype(np.int64), pd.Index(labels)
+
+class SegmentAggregator:
+    """Per-segment counts and means for many dimensions, one bincount per dimension and measure
+
+    Each dimension is integer-coded once, in the smallest dtype that holds
+    its levels, so the stored codes take about one byte per row and
+    dimension. Sums are accumulated dimension by dimension, and no array
+    scales with rows times dimensions.
+    """
+
+    def __init__(self, dimensions):
+        self.names = list(dimensions)
+        self.labels = {}
+        self.dimension_names = {}
+        self.dtypes = {}
+        self.codes = {}
+        self.counts = {}
+
+        for name, keys in dimensions.items():
+            codes, labels = encode_dimension(keys)
+            n_levels = len(labels)
+            # Missing keys go to one spare slot past the end that is never reported
+            codes = np.where(codes >= 0, codes, n_levels)
+            self.labels[name] = labels
+            self.dimension_names[name] = keys.name
+            self.dtypes[name] = keys.dtype
+            self.codes[name] = codes.astype(np.min_scalar_type(n_levels))
+            self.counts[name] = np.bincount(self.codes[name], minlength=n_levels + 1)[:n_levels]
+
+    def sums(self, values):
+        """Per-level sums of one row-aligned measure, keyed by dimension"""
+        weights = np.asarray(values, dtype=np.float64)
+        return {name: np.bincount(codes, weights=weights, minlength=len(self.labels[name]) + 1)[:-1]
+                for name, codes in self.codes.items()}
+
+    def _split(self, name, totals):
+        """One dimension's sums and counts, keeping only observed segments"""
+        labels = self.labels[name]
+        counts = self.counts[name]
+        observed = counts > 0
+        if isinstance(self.dtypes[name], pd.CategoricalDtype):
+            index = pd.CategoricalIndex(labels[observed], dtype=self.dtypes[name],
+                                        name=self.dimension_names[name])
+        else:
+            index = pd.Index(labels[observed], name=self.dimension_names[name])
+        return totals[name][observed], counts[observed], index
+
+    def means(self, values, series_name=None):
+        """Mean of a measure per segment, shaped like groupby(dimension, observed=True).mean()"""
+        values = np.asarray(values)
+        sums = self.sums(values)
+        dtype = values.dtype if np.issubdtype(values.dtype, np.floating) else np.float64
+        result = {}
+        for name in self.names:
+            totals, counts, index = self._split(name, sums)
+            result[name] = pd.Series((totals / counts).astype(dtype), index=index, name=series_name)
+        return result
+
+    def summary(self, churned, probability=None):
+        """Count, churn rate and (optionally) mean probability per segment for every dimension"""
+        churners = self.sums(churned)
+        probability_sums = self.sums(probability) if probability is not None else None
+        result = {}
+        for name in self.names:
+            churner_totals, counts, index = self._split(name, churners)
+            frame = pd.DataFrame({'count': counts, 'churn_rate': churner_totals / counts}, index=index)
+            if probability_sums is not None:
+                frame['mean_probability'] = self._split(name, probability_sums)[0] / counts
+            result[name] = frame
+        return result
@@ -0,0 +1,158 @@
+import json
+import numpy as np
+from scipy import sparse
+
+class FlatTreeEnsemble:
+    """Array-backed node tables for a tree ensemble with a vectorized numpy evaluator
+
+    All trees share one set of node arrays. Leaves point back to themselves,
+    so a batch can be walked for a fixed number of steps (the deepest tree's
+    depth) without per-tree bookkeeping.
+    """
+
+    def __init__(self, kind, feature, threshold, left, right, default_left, value, roots,
+                 max_depth, base_margin=0.0):
+        self.kind = kind
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.left = np.asarray(left, dtype=np.int64)
+        self.right = np.asarray(right, dtype=np.int64)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.int64)
+        self.max_depth = int(max_depth)
+        self.base_margin = float(base_margin)
+
+    @classmethod
+    def from_model(cls, model):
+        """Export a fitted RandomForestClassifier or binary XGBClassifier"""
+        if hasattr(model, 'estimators_'):
+            return cls._from_random_forest(model)
+        if hasattr(model, 'get_booster'):
+            return cls._from_xgboost(model)
+        raise ValueError(f"Unsupported model type: {type(model).__name__}")
+
+    @classmethod
+    def _from_random_forest(cls, model):
+        trees = []
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            proba = tree.value[:, 0, :] / tree.value[:, 0, :].sum(axis=1, keepdims=True)
+            missing_left = getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=bool))
+            trees.append((tree.feature, tree.threshold, tree.children_left, tree.children_right,
+                          missing_left, proba[:, 1]))
+        return cls._concatenate('random_forest', trees)
+
+    @classmethod
+    def _from_xgboost(cls, model):
+        booster = model.get_booster()
+        config = json.loads(booster.save_raw(raw_format='json'))
+        learner = config['learner']
+        if learner['objective']['name'] != 'binary:logistic':
+            raise ValueError("Only binary:logistic XGBoost models can be exported")
+
+        trees = []
+        for tree in learner['gradient_booster']['model']['trees']:
+            # Splits and leaf weights are float32 in XGBoost; leaves keep their weight in split_conditions
+            conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+            left = np.asarray(tree['left_children'])
+            trees.append((np.asarray(tree['split_indices']), conditions, left,
+                          np.asarray(tree['right_children']), np.asarray(tree['default_left'], dtype=bool),
+                          np.where(left == -1, conditions, 0.0)))
+
+        base_score = float(learner['learner_model_param']['base_score'].strip('[]'))
+        base_margin = np.log(base_score / (1 - base_score))
+        return cls._concatenate('xgboost', trees, base_margin)
+
+    @classmethod
+    def _concatenate(cls, kind, trees, base_margin=0.0):
+        """Stack per-tree node arrays into global tables with self-looping leaves"""
+        features, thresholds, lefts, rights, defaults, values, roots = [], [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+        for feature, threshold, left, right, default_left, value in trees:
+            n_nodes = len(left)
+            node_ids = np.arange(n_nodes) + offset
+            is_leaf = np.asarray(left) == -1
+            features.append(np.where(is_leaf, 0, feature))
+            thresholds.append(np.where(is_leaf, np.inf, np.asarray(threshold, dtype=np.float64)))
+            lefts.append(np.where(is_leaf, node_ids, np.asarray(left) + offset))
+            rights.append(np.where(is_leaf, node_ids, np.asarray(right) + offset))
+            defaults.append(default_left)
+            values.append(value)
+            roots.append(offset)
+            max_depth = max(max_depth, cls._tree_depth(left, right))
+            offset += n_nodes
+
+        return cls(kind, np.concatenate(features), np.concatenate(thresholds), np.concatenate(lefts),
+                   np.concatenate(rights), np.concatenate(defaults), np.concatenate(values),
+                   roots, max_depth, base_margin)
+
+    @staticmethod
+    def _tree_depth(left, right):
+        depth = 0
+        stack = [(0, 0)]
+        while stack:
+            node, node_depth = stack.pop()
+            if left[node] == -1:
+                depth = max(depth, node_depth)
+            else:
+                stack.append((left[node], node_depth + 1))
+                stack.append((right[node], node_depth + 1))
+        return depth
+
+    def predict_proba(self, X, batch_size=4096):
+        """Class probabilities with the same (n_samples, 2) layout as the source model
+
+        Sparse input follows the source library: scikit-learn reads absent
+        entries as 0, XGBoost reads them as missing. Dense zeros are always
+        values, so score an XGBoost model trained on CSR with CSR input.
+        """
+        positive = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], batch_size):
+            X_batch = X[start:start + batch_size]
+            if sparse.issparse(X_batch):
+                X_batch = self._densify(X_batch)
+            positive[start:start + batch_size] = self._positive_proba(X_batch)
+        return np.column_stack([1 - positive, positive])
+
+    def _densify(self, X_batch):
+        if self.kind == 'random_forest':
+            return X_batch.toarray()
+        # Only stored entries are present for XGBoost; the rest take the default branch
+        X_batch = X_batch.tocoo()
+        dense = np.full(X_batch.shape, np.nan, dtype=np.float64)
+        dense[X_batch.row, X_batch.col] = X_batch.data
+        return dense
+
+    def _positive_proba(self, X_batch):
+        # Both source libraries compare features in float32
+        X_batch = np.asarray(X_batch, dtype=np.float32).astype(np.float64)
+        rows = np.arange(X_batch.shape[0])[None, :]
+        nodes = np.repeat(self.roots[:, None], X_batch.shape[0], axis=1)
+        for _ in range(self.max_depth):
+            x = X_batch[rows, self.feature[nodes]]
+            threshold = self.threshold[nodes]
+            if self.kind == 'random_forest':
+                go_left = x <= threshold
+            else:
+                go_left = x < threshold
+            go_left = np.where(np.isnan(x), self.default_left[nodes], go_left)
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        leaf_values = self.value[nodes]
+        if self.kind == 'random_forest':
+            return leaf_values.mean(axis=0)
+        return 1 / (1 + np.exp(-(self.base_margin + leaf_values.sum(axis=0))))
+
+    def save(self, path):
+        np.savez(path, kind=self.kind, feature=self.feature, threshold=self.threshold, left=self.left,
+                 right=self.right, default_left=self.default_left, value=self.value, roots=self.roots,
+                 max_depth=self.max_depth, base_margin=self.base_margin)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls(str(arrays['kind']), arrays['feature'], arrays['threshold'], arrays['left'],
+                       arrays['right'], arrays['default_left'], arrays['value'], arrays['roots'],
+                       int(arrays['max_depth']), float(arrays['base_margin']))
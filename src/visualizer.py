@@ -1,13 +1,28 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+from derived_features import DerivedFeatures, SERVICE_COLUMNS
+from plot_aggregates import timed_plot, draw_box_summary, draw_rate_bars
 
 class Visualizer:
-    def __init__(self, data):
+    # Source columns each plot reads (None for the whole frame), used to key the render cache
+    PLOT_COLUMNS = {
+        'plot_feature_importance': [],
+        'plot_customer_lifecycle': ['tenure', 'MonthlyCharges', 'Churn', 'Contract'] + SERVICE_COLUMNS,
+        'plot_churn_analysis': ['Contract', 'InternetService', 'MonthlyCharges', 'tenure', 'Churn'],
+        'plot_correlation_matrix': None
+    }
+
+    def __init__(self, data, derived=None, aggregate=False):
         self.data = data
+        self.derived = derived if derived is not None else DerivedFeatures.for_data(data)
+        # Aggregate mode draws from per-group summaries instead of handing raw rows to seaborn
+        self.aggregate = aggregate
+        self.render_times = {}
         self.plt = plt
         self.sns = sns
         
+    @timed_plot
     def plot_feature_importance(self, feature_importance_dict):
         """Plot feature importance for different models"""
         fig, axes = plt.subplots(len(feature_importance_dict), 1, figsize=(12, 5*len(feature_importance_dict)))
@@ -21,33 +36,29 @@ class Visualizer:
         plt.tight_layout()
         return fig
 
+    @timed_plot
     def plot_customer_lifecycle(self):
         """Plot customer lifecycle visualizations"""
-        # Create tenure segments
-        self.data['tenure_segment'] = pd.qcut(self.data['tenure'], 
-                                            q=4, 
-                                            labels=['New', 'Early', 'Established', 'Loyal'])
+        # Tenure segments come from the shared derived-feature store
+        tenure_segment = self.derived['tenure_segment']
         
         fig, axes = plt.subplots(1, 3, figsize=(20, 6))
         
         # Customer Value Throughout Lifecycle
-        sns.boxplot(data=self.data, x='tenure_segment', y='MonthlyCharges', 
-                   hue='Churn', ax=axes[0])
+        if self.aggregate:
+            draw_box_summary(axes[0], tenure_segment, self.data['MonthlyCharges'], hue=self.data['Churn'])
+        else:
+            sns.boxplot(x=tenure_segment, y=self.data['MonthlyCharges'], 
+                       hue=self.data['Churn'], ax=axes[0])
         axes[0].set_title('Customer Value Throughout Lifecycle')
         
         # Average Services by Tenure
-        services = ['PhoneService', 'InternetService', 'OnlineSecurity', 
-                   'OnlineBackup', 'DeviceProtection', 'TechSupport']
-        # Convert Yes/No to 1/0
-        service_data = self.data[services].copy()
-        for col in services:
-            service_data[col] = (service_data[col] == 'Yes').astype(int)
-        service_counts = service_data.groupby(self.data['tenure_segment'], observed=True).mean()
+        service_counts = self.derived['ServiceSubscriptions'].groupby(tenure_segment, observed=True).mean()
         service_counts.plot(kind='bar', ax=axes[1])
         axes[1].set_title('Average Services by Tenure')
         
         # Contract Type Evolution
-        contract_tenure = pd.crosstab(self.data['tenure_segment'], 
+        contract_tenure = pd.crosstab(tenure_segment, 
                                     self.data['Contract'], 
                                     normalize='index')
         contract_tenure.plot(kind='bar', stacked=True, ax=axes[2])
@@ -56,10 +67,16 @@ class Visualizer:
         plt.tight_layout()
         return fig
 
+    @timed_plot
     def plot_churn_analysis(self):
         """Plot churn analysis visualizations"""
         fig, axes = plt.subplots(2, 2, figsize=(15, 12))
         
+        if self.aggregate:
+            self._plot_churn_summaries(axes)
+            plt.tight_layout()
+            return fig
+        
         # Churn Rate by Contract Type
         sns.barplot(data=self.data, x='Contract', y='Churn', 
                    ax=axes[0, 0])
@@ -83,9 +100,26 @@ class Visualizer:
         plt.tight_layout()
         return fig
 
+    def _plot_churn_summaries(self, axes):
+        """Churn analysis panels drawn from bincount rates and one-pass box statistics"""
+        churned = self.derived['Churned'].rename('Churn')
+        
+        draw_rate_bars(axes[0, 0], self.data['Contract'], churned)
+        axes[0, 0].set_title('Churn Rate by Contract Type')
+        
+        draw_box_summary(axes[0, 1], self.data['Churn'], self.data['MonthlyCharges'])
+        axes[0, 1].set_title('Monthly Charges Distribution by Churn')
+        
+        draw_rate_bars(axes[1, 0], self.data['InternetService'], churned)
+        axes[1, 0].set_title('Churn Rate by Internet Service')
+        
+        draw_box_summary(axes[1, 1], self.data['Churn'], self.data['tenure'])
+        axes[1, 1].set_title('Tenure Distribution by Churn')
+
+    @timed_plot
     def plot_correlation_matrix(self):
         """Plot correlation matrix for numeric features"""
-        numeric_data = self.data.select_dtypes(include=['float64', 'int64'])
+        numeric_data = self.data.select_dtypes(include='number')
         correlation = numeric_data.corr()
         
         plt.figure(figsize=(10, 8))
@@ -0,0 +1,32 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from data_loader import DataLoader
+from feature_processor import FeatureProcessor
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data',
+                         'WA_Fn-UseC_-Telco-Customer-Churn.csv')
+
+
+@pytest.fixture(scope='session')
+def loaded():
+    """A small train/test split of the Telco data with its feature lists"""
+    data_loader = DataLoader(DATA_PATH)
+    data = data_loader.load_data()
+    data_loader.data = data.iloc[:600].reset_index(drop=True)
+    data_loader.prepare_features()
+    X_train, X_test, y_train, y_test = data_loader.split_data(test_size=0.25, random_state=0)
+    return {'data': data_loader.data, 'X_train': X_train, 'X_test': X_test,
+            'y_train': y_train, 'y_test': y_test, 'features': data_loader.get_feature_names()}
+
+
+@pytest.fixture(scope='session')
+def sparse_features(loaded):
+    """The `loaded` split encoded by a FeatureProcessor in sparse (CSR) mode"""
+    processor = FeatureProcessor(loaded['features']['categorical'], loaded['features']['numeric'], sparse=True)
+    X_train = processor.fit_transform(loaded['X_train'])
+    return {'processor': processor, 'X_train': X_train, 'X_test': processor.transform(loaded['X_test']),
+            'y_train': loaded['y_train']}
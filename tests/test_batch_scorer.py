@@ -0,0 +1,26 @@
+import pandas as pd
+from conftest import DATA_PATH
+from batch_scorer import BatchScorer
+from feature_processor import FeatureProcessor
+from model_trainer import ModelTrainer
+
+
+def test_dropped_rows_are_counted(loaded, tmp_path):
+    processor = FeatureProcessor(loaded['features']['categorical'], loaded['features']['numeric'])
+    trainer = ModelTrainer()
+    trainer.models = {'logistic': trainer.models['logistic']}
+    trainer.train_models(processor.fit_transform(loaded['X_train']), loaded['y_train'])
+
+    source = pd.read_csv(DATA_PATH, nrows=250, dtype={'TotalCharges': str})
+    source.loc[[3, 50, 120], 'TotalCharges'] = ' '
+    source.loc[200, 'Contract'] = None
+    input_path, output_path = tmp_path / 'customers.csv', tmp_path / 'scores.csv'
+    source.to_csv(input_path, index=False)
+    already_blank = int((pd.to_numeric(source['TotalCharges'], errors='coerce').isna()
+                         | source['Contract'].isna()).sum())
+
+    stats = BatchScorer(processor, trainer, 'logistic').score_csv(input_path, output_path, chunk_size=100)
+    assert stats['rows_read'] == len(source)
+    assert stats['rows_dropped'] == already_blank >= 4
+    assert stats['rows'] + stats['rows_dropped'] == stats['rows_read']
+    assert len(pd.read_csv(output_path)) == stats['rows']
@@ -0,0 +1,77 @@
+import mmap
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import DATA_PATH
+from column_cache import ColumnCache
+from data_loader import CATEGORY_LEVELS, DataLoader
+
+
+def test_rewriting_store_with_fewer_parts_drops_stale_parts(tmp_path):
+    data_loader = DataLoader(DATA_PATH)
+    expected_rows = len(data_loader.load_data())
+
+    first = data_loader.write_chunks(tmp_path, chunk_size=1000)
+    second = data_loader.write_chunks(tmp_path, chunk_size=5000)
+    assert len(second['paths']) < len(first['paths'])
+
+    chunks = list(DataLoader.iter_store(tmp_path))
+    assert len(chunks) == len(second['paths'])
+    assert sum(len(chunk) for chunk in chunks) == second['rows'] == expected_rows
+
+
+def test_compact_mode_keeps_declared_levels():
+    full = DataLoader(DATA_PATH).load_data()
+    compact = DataLoader(DATA_PATH, compact=True).load_data()
+    assert len(compact) == len(full)
+    for column, levels in CATEGORY_LEVELS.items():
+        assert list(compact[column].cat.categories) == levels
+        assert (compact[column].astype(str) == full[column].astype(str)).all()
+
+
+def test_compact_mode_rejects_unknown_categories(tmp_path):
+    source = pd.read_csv(DATA_PATH, nrows=300)
+    source.loc[[5, 17, 42], 'Contract'] = 'Three year'
+    path = tmp_path / 'customers.csv'
+    source.to_csv(path, index=False)
+
+    with pytest.raises(ValueError, match=r"3 rows with unknown categories \['Three year'\] in column 'Contract'"):
+        DataLoader(str(path), compact=True).load_data()
+    with pytest.raises(ValueError, match="Three year"):
+        list(DataLoader(str(path), compact=True).iter_chunks(chunk_size=100))
+
+
+def _is_mapped(values):
+    base = values
+    while isinstance(base, np.ndarray):
+        base = base.base
+    return isinstance(base, mmap.mmap)
+
+
+def test_cached_columns_stay_memory_mapped(tmp_path):
+    data = DataLoader(DATA_PATH, compact=True).load_data()
+    cache = ColumnCache(str(tmp_path))
+    cache.save('entry', data)
+    loaded = cache.load('entry')
+    pd.testing.assert_frame_equal(loaded, data)
+
+    for name in ['tenure', 'MonthlyCharges', 'Contract']:
+        values = loaded[name].array
+        assert _is_mapped(values.codes if isinstance(values, pd.Categorical) else values.to_numpy())
+
+
+def test_cache_hit_reports_rows_dropped_by_the_cached_read(tmp_path):
+    source = pd.read_csv(DATA_PATH, nrows=300, dtype={'TotalCharges': str})
+    source.loc[[3, 9], 'TotalCharges'] = ' '
+    path = tmp_path / 'customers.csv'
+    source.to_csv(path, index=False)
+
+    first = DataLoader(str(path), cache_dir=str(tmp_path / 'cache'))
+    first.load_data()
+    assert (first.rows_read, first.rows_dropped) == (300, 2)
+
+    second = DataLoader(str(path), cache_dir=str(tmp_path / 'cache'))
+    # Counts left over from an earlier pass must not survive a cache hit
+    second.rows_read, second.rows_dropped = 7, 5
+    second.load_data()
+    assert (second.rows_read, second.rows_dropped) == (300, 2)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from xgboost import XGBClassifier
+from scoring_service import ScoringService
+from tree_ensemble import FlatTreeEnsemble
+
+
+@pytest.fixture(scope='module')
+def sparse_trained(loaded, sparse_features):
+    """XGBoost fitted on the shared CSR features, with its scores on the raw test rows"""
+    model = XGBClassifier(n_estimators=30, random_state=0).fit(sparse_features['X_train'],
+                                                               sparse_features['y_train'])
+    expected = model.predict_proba(sparse_features['X_test'])[:, 1]
+    return sparse_features['processor'], model, loaded['X_test'], expected
+
+
+def test_sparse_mode_emits_csr(sparse_trained):
+    processor, _, X_test, _ = sparse_trained
+    assert sp.issparse(processor.transform(X_test))
+
+
+def test_compiled_processor_scores_sparse_trained_model_like_csr(sparse_trained):
+    processor, model, X_test, expected = sparse_trained
+    compiled = processor.compile()
+    X_dense = compiled.transform_columns(X_test)
+    np.testing.assert_allclose(X_dense, processor.transform(X_test).toarray(), atol=1e-6)
+
+    np.testing.assert_allclose(model.predict_proba(compiled.model_input(X_dense))[:, 1], expected, atol=1e-6)
+    flat = FlatTreeEnsemble.from_model(model)
+    np.testing.assert_allclose(flat.predict_proba(compiled.model_input(X_dense))[:, 1], expected, atol=1e-6)
+
+
+def test_sparse_trained_xgboost_differs_on_raw_dense_input(sparse_trained):
+    # Why model_input exists: dense zeros are values, absent CSR entries are missing
+    processor, model, X_test, expected = sparse_trained
+    X_dense = processor.compile().transform_columns(X_test)
+    assert not np.allclose(model.predict_proba(X_dense)[:, 1], expected, atol=1e-3)
+
+
+def test_scoring_service_matches_csr_scores(sparse_trained):
+    processor, model, X_test, expected = sparse_trained
+    service = ScoringService(processor.compile(), model, max_batch_size=len(X_test))
+    records = X_test.to_dict('records')
+    np.testing.assert_allclose(service.score_batch(records), expected, atol=1e-6)
@@ -0,0 +1,33 @@
+import os
+import figure_renderer
+from figure_renderer import FigureRenderer, RenderJob
+
+
+def test_single_job_renders_in_worker_process(loaded, tmp_path):
+    renderer = FigureRenderer({'all': loaded['data']}, str(tmp_path), cache=False)
+    [result] = renderer.render([RenderJob('visualizer', 'plot_correlation_matrix', ['correlation_matrix.png'])])
+
+    assert result['pid'] != os.getpid()
+    assert os.path.getsize(result['paths'][0]) > 0
+    # The parent never builds plotters or takes a copy of the datasets
+    assert figure_renderer._worker_plotters == {}
+    assert figure_renderer._worker_datasets is None
+
+
+def test_job_key_tracks_derived_feature_and_segment_sources(loaded, tmp_path, monkeypatch):
+    import inspect
+    import derived_features
+    import segment_engine
+
+    renderer = FigureRenderer({'all': loaded['data']}, str(tmp_path))
+    job = RenderJob('visualizer', 'plot_churn_analysis', ['churn_analysis.png'])
+    baseline = renderer.job_key(job)
+
+    for module in (derived_features, segment_engine):
+        edited = tmp_path / f'{module.__name__}.py'
+        edited.write_text(inspect.getsource(module) + '\n# edited\n')
+        with monkeypatch.context() as patch:
+            real = inspect.getsourcefile
+            patch.setattr(inspect, 'getsourcefile',
+                          lambda obj, module=module: str(edited) if obj is module else real(obj))
+            assert renderer.job_key(job) != baseline
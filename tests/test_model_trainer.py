@@ -0,0 +1,49 @@
+import pytest
+import scipy.sparse as sp
+from model_trainer import ModelTrainer
+from profiler import profiler
+
+
+@pytest.mark.parametrize('profiling', [False, True])
+def test_train_models_accepts_sparse_input(sparse_features, profiling):
+    X_train, y_train = sparse_features['X_train'], sparse_features['y_train']
+    assert sp.issparse(X_train)
+    if profiling:
+        profiler.enable(trace_memory=False)
+    try:
+        trainer = ModelTrainer()
+        trainer.train_models(X_train, y_train)
+    finally:
+        profiler.disable()
+        profiler.events.clear()
+    assert set(trainer.trained_models) == {'logistic', 'random_forest', 'xgboost'}
+
+
+def test_profiled_training_records_row_counts(sparse_features):
+    X_train, y_train = sparse_features['X_train'], sparse_features['y_train']
+    profiler.enable(trace_memory=False)
+    try:
+        ModelTrainer().train_models(X_train, y_train)
+        spans = [span for span in profiler.summary('model') if span['name'].startswith('train.')]
+    finally:
+        profiler.disable()
+        profiler.events.clear()
+    assert len(spans) == 3
+    assert all(span['rows'] == X_train.shape[0] for span in spans)
+
+
+@pytest.mark.parametrize('total_cores', range(1, 9))
+def test_core_budget_never_oversubscribes(total_cores):
+    budget = ModelTrainer._split_core_budget(total_cores)
+    assert all(cores >= 1 for cores in budget.values())
+    if total_cores >= 3:
+        # One core stays with logistic regression
+        assert sum(budget.values()) + 1 <= total_cores
+
+
+def test_small_core_budget_trains_sequentially(sparse_features):
+    X_train, y_train = sparse_features['X_train'], sparse_features['y_train']
+    trainer = ModelTrainer()
+    times = trainer.train_models(X_train, y_train, parallel=True, n_jobs=2)
+    assert {name: entry['n_jobs'] for name, entry in times.items()} == {
+        'logistic': None, 'random_forest': 2, 'xgboost': 2}
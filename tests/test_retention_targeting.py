@@ -0,0 +1,54 @@
+import itertools
+import numpy as np
+import pytest
+from retention_targeting import RetentionTargeting
+
+
+def brute_force_value(targeting, churn_probability, monthly_charges, budget):
+    """Best total expected value over every assignment of at most one intervention per customer"""
+    revenue = targeting.retained_revenue(churn_probability, monthly_charges)
+    best = 0.0
+    for combo in itertools.product([None] + list(range(len(targeting.costs))), repeat=len(revenue)):
+        chosen = [(i, k) for i, k in enumerate(combo) if k is not None]
+        if sum(targeting.costs[k] for _, k in chosen) > budget:
+            continue
+        best = max(best, sum(revenue[i] * targeting.effects[k] - targeting.costs[k] for i, k in chosen))
+    return best
+
+
+def test_upgrade_that_does_not_fit_does_not_block_cheaper_ones():
+    churn_probability = np.r_[0.99, np.full(100, 0.5)]
+    monthly_charges = np.r_[110.0, np.full(100, 30.0)]
+    plan = RetentionTargeting().select(churn_probability, monthly_charges, 40)
+    assert plan['total_cost'] == 40
+    assert list(plan['interventions']) == ['email_offer'] * 8
+    assert plan['total_expected_value'] == pytest.approx(88.34)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_greedy_against_brute_force(seed):
+    targeting = RetentionTargeting()
+    rng = np.random.default_rng(seed)
+    chain_names = list(targeting.names[targeting.chain])
+    for _ in range(40):
+        churn_probability, monthly_charges = rng.random(6), rng.uniform(20, 120, 6)
+        budget = rng.uniform(0, 400)
+        plan = targeting.select(churn_probability, monthly_charges, budget)
+        optimum = brute_force_value(targeting, churn_probability, monthly_charges, budget)
+        revenue = targeting.retained_revenue(churn_probability, monthly_charges)
+
+        assert plan['total_cost'] <= budget + 1e-9
+        assert plan['total_expected_value'] <= optimum + 1e-9
+        # The LP bound: the greedy is short of the optimum by at most one upgrade's value
+        step_values = [revenue * (targeting.effects[targeting.chain[k]]
+                                  - (targeting.effects[targeting.chain[k - 1]] if k else 0.0))
+                       - targeting.extra_costs[k] for k in range(len(targeting.chain))]
+        assert optimum - plan['total_expected_value'] <= max(values.max() for values in step_values) + 1e-9
+
+        # No customer's next worthwhile upgrade still fits in the budget that is left
+        steps = np.zeros(len(revenue), dtype=int)
+        steps[plan['customers']] = [chain_names.index(name) + 1 for name in plan['interventions']]
+        left = budget - plan['total_cost']
+        for i, step in enumerate(steps):
+            if step < len(targeting.chain) and revenue[i] * targeting.slopes[step] > 1:
+                assert targeting.extra_costs[step] > left
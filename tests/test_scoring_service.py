@@ -0,0 +1,108 @@
+import asyncio
+import json
+import pytest
+from xgboost import XGBClassifier
+from feature_processor import FeatureProcessor
+from scoring_service import LatencyStats, MicroBatcher, ScoringService
+
+
+@pytest.fixture(scope='module')
+def service_parts(loaded):
+    processor = FeatureProcessor(loaded['features']['categorical'], loaded['features']['numeric'])
+    model = XGBClassifier(n_estimators=10, random_state=0).fit(processor.fit_transform(loaded['X_train']),
+                                                               loaded['y_train'])
+    return processor.compile(), model
+
+
+def exchange(service, raw_request):
+    """Send raw bytes to a served instance and return the raw response"""
+    async def run():
+        batch_task = asyncio.create_task(service.batcher.run())
+        server = await asyncio.start_server(service.handle_connection, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(raw_request)
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), timeout=10)
+            writer.close()
+            return response
+        finally:
+            server.close()
+            batch_task.cancel()
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize('raw_request', [b'garbage\r\n', b'\r\n',
+                                         b'POST /score HTTP/1.1\r\nContent-Length: abc\r\n\r\n'])
+def test_malformed_request_gets_400(service_parts, raw_request):
+    response = exchange(ScoringService(*service_parts), raw_request)
+    assert response.startswith(b'HTTP/1.1 400 Bad Request')
+
+
+def test_well_formed_request_still_served(service_parts):
+    response = exchange(ScoringService(*service_parts), b'GET /health HTTP/1.1\r\nConnection: close\r\n\r\n')
+    assert response.startswith(b'HTTP/1.1 200 OK')
+    assert response.endswith(b'{"status": "ok"}')
+
+
+def test_batcher_survives_unexpected_scoring_errors():
+    calls = []
+
+    def score_batch(records):
+        calls.append(records)
+        if len(calls) == 1:
+            raise RuntimeError('model crashed')
+        return [0.5] * len(records)
+
+    async def run():
+        batcher = MicroBatcher(score_batch, max_batch_size=4, max_wait_ms=1.0)
+        batch_task = asyncio.create_task(batcher.run())
+        try:
+            with pytest.raises(RuntimeError, match='model crashed'):
+                await asyncio.wait_for(batcher.submit({}), timeout=5)
+            # The loop is still draining the queue after the failure
+            return await asyncio.wait_for(batcher.submit({}), timeout=5)
+        finally:
+            batch_task.cancel()
+
+    assert asyncio.run(run()) == 0.5
+
+
+def test_throughput_ignores_idle_uptime(monkeypatch):
+    import scoring_service
+
+    clock = [0.0]
+    monkeypatch.setattr(scoring_service.time, 'perf_counter', lambda: clock[0])
+    stats = LatencyStats(rate_window_seconds=10.0)
+
+    # A burst of 500 requests over five seconds after a long idle start
+    clock[0] = 1000.0
+    for i in range(500):
+        clock[0] = 1000.0 + i / 100
+        stats.record_request(0.001)
+    clock[0] = 1005.0
+    assert stats.snapshot()['throughput_rps'] == pytest.approx(50.0)
+
+    # Once the service goes quiet the rate falls away instead of averaging over uptime
+    clock[0] = 2000.0
+    assert stats.snapshot()['throughput_rps'] == 0.0
+
+
+@pytest.mark.parametrize('value', [None, 'abc', '12', float('nan'), float('inf'), True])
+def test_non_numeric_values_are_rejected(service_parts, loaded, value):
+    record = loaded['X_test'].iloc[0].to_dict()
+    record['tenure'] = value
+    body = json.dumps(record, allow_nan=True).encode()
+    response = exchange(ScoringService(*service_parts),
+                        b'POST /score HTTP/1.1\r\nConnection: close\r\nContent-Length: %d\r\n\r\n' % len(body) + body)
+    assert response.startswith(b'HTTP/1.1 400 Bad Request')
+    assert b'Invalid record' in response and b'tenure' in response
+
+
+def test_valid_record_still_scored(service_parts, loaded):
+    body = json.dumps(loaded['X_test'].iloc[0].to_dict()).encode()
+    response = exchange(ScoringService(*service_parts),
+                        b'POST /score HTTP/1.1\r\nConnection: close\r\nContent-Length: %d\r\n\r\n' % len(body) + body)
+    assert response.startswith(b'HTTP/1.1 200 OK')
+    assert 0 <= json.loads(response.split(b'\r\n\r\n', 1)[1])['churn_probability'] <= 1
@@ -0,0 +1,56 @@
+import tracemalloc
+import numpy as np
+import pandas as pd
+import pytest
+from segment_engine import SegmentAggregator
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 5000
+    frame = pd.DataFrame({
+        'contract': pd.Categorical(rng.choice(['Month-to-month', 'One year', 'Two year'], n),
+                                   categories=['Month-to-month', 'One year', 'Two year', 'Unused']),
+        'payment': rng.choice(['Card', 'Check', 'Transfer'], n).astype(object),
+        'tenure_bin': pd.cut(rng.integers(0, 72, n), [0, 12, 24, 48, 72]),
+        'churned': rng.integers(0, 2, n),
+        'probability': rng.random(n)
+    })
+    frame.loc[::97, 'payment'] = None
+    return frame
+
+
+def test_summary_matches_groupby(frame):
+    dimensions = ['contract', 'payment', 'tenure_bin']
+    aggregator = SegmentAggregator({name: frame[name] for name in dimensions})
+    summary = aggregator.summary(frame['churned'], frame['probability'])
+    for name in dimensions:
+        grouped = frame.groupby(name, observed=True)
+        pd.testing.assert_series_equal(summary[name]['count'], grouped.size(), check_names=False)
+        np.testing.assert_allclose(summary[name]['churn_rate'], grouped['churned'].mean())
+        np.testing.assert_allclose(summary[name]['mean_probability'], grouped['probability'].mean())
+
+
+def test_means_keep_index_type(frame):
+    means = SegmentAggregator({'tenure_bin': frame['tenure_bin']}).means(frame['probability'], 'probability')
+    expected = frame.groupby('tenure_bin', observed=True)['probability'].mean()
+    pd.testing.assert_series_equal(means['tenure_bin'], expected)
+
+
+def test_sums_do_not_scale_with_rows_times_dimensions():
+    n, n_dimensions = 1000000, 8
+    rng = np.random.default_rng(0)
+    dimensions = {f'd{i}': pd.Series(rng.integers(0, 20, n)) for i in range(n_dimensions)}
+    aggregator = SegmentAggregator(dimensions)
+    values = rng.random(n)
+
+    tracemalloc.start()
+    try:
+        aggregator.sums(values)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    # A tiled copy of the weights alone would take n_dimensions * n * 8 bytes
+    assert peak < 2 * n * 8
+    assert sum(codes.nbytes for codes in aggregator.codes.values()) == n * n_dimensions
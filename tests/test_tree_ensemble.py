@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from sklearn.ensemble import RandomForestClassifier
+from xgboost import XGBClassifier
+from tree_ensemble import FlatTreeEnsemble
+
+
+@pytest.mark.parametrize('model', [XGBClassifier(n_estimators=30, random_state=0),
+                                   RandomForestClassifier(n_estimators=20, random_state=0)],
+                         ids=['xgboost', 'random_forest'])
+def test_sparse_input_matches_source_model(sparse_features, model):
+    X_train, X_test, y_train = sparse_features['X_train'], sparse_features['X_test'], sparse_features['y_train']
+    assert sp.issparse(X_test)
+    model.fit(X_train, y_train)
+    flat = FlatTreeEnsemble.from_model(model)
+    np.testing.assert_allclose(flat.predict_proba(X_test), model.predict_proba(X_test), atol=1e-6)
+
+
+def test_xgboost_sparse_entries_are_missing_not_zero(sparse_features):
+    X_train, X_test, y_train = sparse_features['X_train'], sparse_features['X_test'], sparse_features['y_train']
+    model = XGBClassifier(n_estimators=30, random_state=0).fit(X_train, y_train)
+    flat = FlatTreeEnsemble.from_model(model)
+    # Explicit zeros are values to XGBoost, so the dense copy scores like the model on dense input
+    np.testing.assert_allclose(flat.predict_proba(X_test.toarray()),
+                               model.predict_proba(X_test.toarray()), atol=1e-6)